@@ -0,0 +1,353 @@
+"""Session-scoped execution resources shared by module dispatchers."""
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from ansible.executor.stats import AggregateStats
+from ansible.executor.task_queue_manager import TaskQueueManager
+
+
+# Held while ansible loads a plugin module
+_plugin_load_lock = threading.RLock()
+
+
+def serialize_plugin_loading():
+    """Make ansible load one plugin module at a time.
+
+    The plugin loader publishes a plugin module before running its code, so
+    plays running concurrently may otherwise see partially loaded plugins.
+    """
+    from ansible.plugins.loader import PluginLoader
+
+    with _plugin_load_lock:
+        load_module_source = PluginLoader._load_module_source
+        if getattr(load_module_source, "serialized", False):
+            return
+
+        def serialized_load_module_source(loader, name, path):
+            with _plugin_load_lock:
+                return load_module_source(loader, name, path)
+
+        serialized_load_module_source.serialized = True
+        PluginLoader._load_module_source = serialized_load_module_source
+
+
+def _run_future(future, fn, args, kwargs):
+    """Run `fn(*args, **kwargs)` and resolve `future`."""
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result(result)
+
+
+def start_thread(fn, *args, **kwargs):
+    """Run `fn(*args, **kwargs)` on a new thread, returning a concurrent.futures.Future.
+
+    Ansible forks its workers from the thread running a play.  Workers forked
+    from a concurrent.futures pool thread run the pool's exit hook, which tries
+    to join that thread and makes them exit with an error, so plays only ever
+    run on plain threads.
+    """
+    serialize_plugin_loading()
+    future = Future()
+    thread = threading.Thread(
+        target=_run_future, args=(future, fn, args, kwargs), name="pytest-ansible"
+    )
+    thread.start()
+    return future
+
+
+class TaskQueueManagerPool(object):
+
+    """Keep TaskQueueManager instances alive between module calls.
+
+    Creating a TaskQueueManager sets up the multiprocessing result queue, the
+    connection lock file and the callback plugins, and cleaning it up tears all
+    of that down again.  The pool hands out an idle manager created for the same
+    inventory sources and connection settings, pointed at the inventory,
+    variable manager and loader of the caller, and only cleans managers up when
+    they are evicted or the pool is shut down.
+    """
+
+    def __init__(self, maxsize=16):
+        """Initialize an empty pool holding at most `maxsize` idle managers."""
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._idle = []
+
+    def __len__(self):
+        """Return the number of idle managers."""
+        return len(self._idle)
+
+    @staticmethod
+    def _make_key(**kwargs):
+        """Return a hashable key describing the TaskQueueManager `kwargs`."""
+        key = []
+        for name, value in sorted(kwargs.items()):
+            if name in ("variable_manager", "loader"):
+                # Every host manager has its own, see _reset()
+                continue
+            if name == "inventory":
+                value = tuple(getattr(value, "_sources", None) or ())
+            elif isinstance(value, dict):
+                value = tuple(sorted(value.items()))
+            key.append((name, value))
+        return tuple(key)
+
+    def _acquire(self, key):
+        """Remove and return an idle manager matching `key`, if any."""
+        with self._lock:
+            for index in range(len(self._idle) - 1, -1, -1):
+                if self._idle[index][0] == key:
+                    return self._idle.pop(index)[1]
+        return None
+
+    def _release(self, key, tqm):
+        """Return `tqm` to the pool, evicting the least recently used manager."""
+        evicted = []
+        with self._lock:
+            self._idle.append((key, tqm))
+            while len(self._idle) > self.maxsize:
+                evicted.append(self._idle.pop(0)[1])
+        for manager in evicted:
+            manager.cleanup()
+
+    # TaskQueueManager attributes holding the state of the last play it ran
+    _play_state = ("_stdout_callback", "_terminated", "_stats", "_unreachable_hosts")
+
+    # TaskQueueManager arguments a manager is pointed at for every play
+    _bindings = ("inventory", "variable_manager", "loader")
+
+    @classmethod
+    def _reset(cls, tqm, stdout_callback, **kwargs):
+        """Prepare a previously used manager for running a new play.
+
+        The manager is pointed at the inventory, variable manager and loader of
+        `kwargs`.  Return False when this ansible version keeps the play state
+        of `tqm` in other attributes, in which case the manager can not be
+        reused.
+        """
+        attributes = cls._play_state + tuple("_" + name for name in cls._bindings)
+        if not all(hasattr(tqm, name) for name in attributes) or not hasattr(
+            tqm, "clear_failed_hosts"
+        ):
+            return False
+        for name in cls._bindings:
+            setattr(tqm, "_" + name, kwargs[name])
+        tqm._stdout_callback = stdout_callback
+        tqm._terminated = False
+        tqm._stats = AggregateStats()
+        tqm._unreachable_hosts = dict()
+        tqm.clear_failed_hosts()
+        return True
+
+    @contextmanager
+    def lease(self, stdout_callback, **kwargs):
+        """Yield a TaskQueueManager reporting to `stdout_callback`.
+
+        The keyword arguments are passed to TaskQueueManager when no idle manager
+        matches them.  A manager whose play raised is cleaned up instead of being
+        returned to the pool.
+        """
+        key = self._make_key(**kwargs)
+        tqm = self._acquire(key)
+        if tqm is not None and not self._reset(tqm, stdout_callback, **kwargs):
+            tqm.cleanup()
+            tqm = None
+        if tqm is None:
+            tqm = TaskQueueManager(stdout_callback=stdout_callback, **kwargs)
+
+        try:
+            yield tqm
+        except BaseException:
+            tqm.cleanup()
+            raise
+        else:
+            self._release(key, tqm)
+
+    def shutdown(self):
+        """Clean up every idle manager."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _key, tqm in idle:
+            tqm.cleanup()
+
+
+class DispatchExecutor(object):
+
+    """Run module calls in the background, at most `max_workers` at once.
+
+    Calls are queued and run by up to `max_workers` long-lived threads, started
+    as calls are submitted.  Those are plain threads, like the ones started by
+    `start_thread`.
+    """
+
+    def __init__(self, max_workers=8):
+        """Initialize an executor running at most `max_workers` calls at once."""
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+
+    @staticmethod
+    def _work(calls):
+        """Run the calls taken from the `calls` queue, until it yields None."""
+        while True:
+            call = calls.get()
+            if call is None:
+                return
+            _run_future(*call)
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule `fn(*args, **kwargs)`, returning a concurrent.futures.Future."""
+        serialize_plugin_loading()
+        future = Future()
+        with self._lock:
+            self._queue.put((future, fn, args, kwargs))
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._work, args=(self._queue,), name="pytest-ansible"
+                )
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def shutdown(self):
+        """Wait for the submitted calls and stop the threads running them."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            calls, self._queue = self._queue, queue.SimpleQueue()
+        for _thread in threads:
+            calls.put(None)
+        for thread in threads:
+            thread.join()
+
+
+class ConnectionCache(object):
+
+    """Keep connections to remote hosts open between module calls.
+
+    SSH connections are multiplexed through ControlMaster sockets created in a
+    directory owned by the session.  Persistent connection daemons, used by
+    network_cli or netconf, are reset by the strategy at the end of every play;
+    once enabled, the cache takes them over instead, so the next play reuses
+    them.  Shutting the cache down closes every connection it knows about.
+    """
+
+    def __init__(self):
+        """Initialize a disabled cache."""
+        self._lock = threading.Lock()
+        self._directory = None
+        self._environ = {}
+        self._sockets = set()
+        self._strategy_cleanup = None
+
+    @property
+    def enabled(self):
+        """Return whether connections are kept open."""
+        return self._directory is not None
+
+    def __len__(self):
+        """Return the number of persistent connections kept open."""
+        return len(self._sockets)
+
+    def _setenv(self, name, value):
+        """Set the environment variable `name` unless the user already set it."""
+        if name in os.environ:
+            return
+        self._environ[name] = None
+        os.environ[name] = value
+
+    def _adopt(self, strategy):
+        """Take over the persistent connections `strategy` is about to reset."""
+        with self._lock:
+            self._sockets.update(strategy._active_connections.values())
+        strategy._active_connections.clear()
+
+    def enable(self, idle_timeout=600):
+        """Keep connections open, closing idle persistent connections after `idle_timeout` seconds."""
+        from ansible.plugins.strategy import StrategyBase
+
+        with self._lock:
+            if self._directory is not None:
+                return
+            self._directory = tempfile.mkdtemp(prefix="pytest-ansible-")
+
+            # Connection plugin options are read from the environment when a
+            # connection is set up, which happens in the forked workers
+            self._setenv(
+                "ANSIBLE_SSH_CONTROL_PATH_DIR", os.path.join(self._directory, "cp")
+            )
+            self._setenv("ANSIBLE_PERSISTENT_CONNECT_TIMEOUT", str(idle_timeout))
+
+            strategy_cleanup = self._strategy_cleanup = StrategyBase.cleanup
+
+            def cleanup(strategy):
+                self._adopt(strategy)
+                strategy_cleanup(strategy)
+
+            StrategyBase.cleanup = cleanup
+
+    def shutdown(self):
+        """Close every cached connection and stop keeping connections open."""
+        from ansible.module_utils.connection import Connection
+        from ansible.module_utils.connection import ConnectionError
+        from ansible.plugins.strategy import StrategyBase
+
+        with self._lock:
+            if self._directory is None:
+                return
+            directory, self._directory = self._directory, None
+            sockets, self._sockets = self._sockets, set()
+            StrategyBase.cleanup = self._strategy_cleanup
+            for name in self._environ:
+                os.environ.pop(name, None)
+            self._environ = {}
+
+        for socket_path in sockets:
+            try:
+                Connection(socket_path).reset()
+            except ConnectionError:
+                pass
+
+        control_path_dir = os.path.join(directory, "cp")
+        if os.path.isdir(control_path_dir):
+            for name in os.listdir(control_path_dir):
+                # ssh needs a destination, which is ignored with an explicit ControlPath
+                subprocess.call(
+                    [
+                        "ssh",
+                        "-o",
+                        "ControlPath=%s" % os.path.join(control_path_dir, name),
+                        "-O",
+                        "exit",
+                        "pytest-ansible",
+                    ],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+task_queue_manager_pool = TaskQueueManagerPool()
+dispatch_executor = DispatchExecutor()
+connection_cache = ConnectionCache()
+
+
+def shutdown():
+    """Release every resource held by the session-scoped executors."""
+    dispatch_executor.shutdown()
+    task_queue_manager_pool.shutdown()
+    connection_cache.shutdown()
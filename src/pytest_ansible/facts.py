@@ -0,0 +1,144 @@
+"""Cache the facts gathered by the `ansible_facts` fixture."""
+
+import hashlib
+import threading
+import time
+
+from pytest_ansible.results import AdHocResult
+from pytest_ansible.results import ModuleResult
+
+
+class FactsCache(object):
+
+    """Keep the `setup` result of every host between fact gatherings.
+
+    Entries are keyed on the host name, the requested `gather_subset` and how
+    the host is reached (inventory, connection and become settings), and expire
+    after `ttl` seconds (never, when `ttl` is not positive).  The `mode`
+    selects where entries live:
+
+    * ``off``: always gather facts
+    * ``memory``: keep entries for the duration of the session
+    * ``disk``: also persist entries in the pytest cache between sessions
+    * ``refresh``: gather facts again and replace the persisted entries
+    """
+
+    modes = ("off", "memory", "disk", "refresh")
+    cache_key = "ansible/facts"
+
+    def __init__(self, mode="off", ttl=3600, cache=None):
+        """Initialize an empty facts cache, persisted in the pytest `cache` if needed."""
+        if mode not in self.modes:
+            raise ValueError("Unknown facts cache mode '%s'" % mode)
+        self.mode = mode
+        self.ttl = ttl
+        self._cache = cache if mode in ("disk", "refresh") else None
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    @property
+    def entries(self):
+        """Return the cached entries, loading persisted entries on first use."""
+        if self._entries is None:
+            self._entries = dict()
+            if self._cache is not None and self.mode != "refresh":
+                self._entries.update(self._cache.get(self.cache_key, {}))
+        return self._entries
+
+    # Dispatcher options selecting how a host is reached and as which user
+    context_options = (
+        "inventory",
+        "extra_inventory",
+        "connection",
+        "user",
+        "become",
+        "become_method",
+        "become_user",
+    )
+
+    @classmethod
+    def _make_key(cls, host, gather_subset, options):
+        """Return the key of the facts of `host` gathered with `gather_subset`.
+
+        The same host name reached through another inventory, connection or
+        privilege escalation gets other facts, so a digest of these `options`
+        is part of the key.
+        """
+        if isinstance(gather_subset, (list, tuple, set)):
+            gather_subset = ",".join(sorted(gather_subset))
+        context = repr([options.get(name) for name in cls.context_options])
+        digest = hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+        return "{0}|{1}|{2}".format(host, gather_subset or "all", digest)
+
+    def _is_fresh(self, entry, now):
+        """Return whether the cached `entry` has not expired yet."""
+        return self.ttl <= 0 or now - entry["time"] < self.ttl
+
+    @staticmethod
+    def _list_hosts(dispatcher):
+        """Return the names of the hosts `dispatcher` runs modules against."""
+        pattern = dispatcher.options["host_pattern"]
+        hosts = []
+        # Setting the subset of the shared inventory managers must not race with
+        # module calls using another subset
+        with dispatcher._call_context():
+            for name in ("inventory_manager", "extra_inventory_manager"):
+                if name not in dispatcher.options:
+                    continue
+                inventory_manager = dispatcher.options[name]
+                inventory_manager.subset(dispatcher.options.get("subset"))
+                hosts.extend(h.name for h in inventory_manager.list_hosts(pattern))
+        return hosts
+
+    def gather(self, dispatcher, **setup_args):
+        """Return the AdHocResult of the `setup` module on the hosts of `dispatcher`.
+
+        Only hosts without fresh cached facts are contacted.
+        """
+        if self.mode == "off":
+            return dispatcher.setup(**setup_args)
+
+        hosts = self._list_hosts(dispatcher)
+        if not hosts:
+            # Leave the implicit localhost and error reporting to the dispatcher
+            return dispatcher.setup(**setup_args)
+
+        gather_subset = setup_args.get("gather_subset")
+        now = time.time()
+        contacted = dict()
+        unreachable = dict()
+        missing = []
+        with self._lock:
+            for host in hosts:
+                entry = self.entries.get(
+                    self._make_key(host, gather_subset, dispatcher.options)
+                )
+                if entry is not None and self._is_fresh(entry, now):
+                    contacted[host] = entry["result"]
+                else:
+                    missing.append(host)
+
+        if missing:
+            options = dict(dispatcher.options, host_pattern=":".join(missing))
+            result = dispatcher.__class__(**options).setup(**setup_args)
+            with self._lock:
+                for host, module_result in result.contacted.items():
+                    contacted[host] = module_result
+                    if ModuleResult(module_result).is_failed:
+                        continue
+                    self.entries[
+                        self._make_key(host, gather_subset, dispatcher.options)
+                    ] = dict(time=now, result=module_result)
+                    self._dirty = True
+            unreachable.update(result.unreachable)
+
+        return AdHocResult(contacted=contacted, unreachable=unreachable)
+
+    def save(self):
+        """Persist the cached entries in the pytest cache, if they changed."""
+        with self._lock:
+            if self._cache is None or not self._dirty:
+                return
+            self._cache.set(self.cache_key, self._entries)
+            self._dirty = False
@@ -1,8 +1,16 @@
 """PyTest fixtures."""
 
+from functools import partial
+
 import pytest
 
 
+def _ansible_module(ansible_adhoc):
+    """Return the module dispatcher for the configured host pattern."""
+    host_mgr = ansible_adhoc()
+    return getattr(host_mgr, host_mgr.options["host_pattern"])
+
+
 @pytest.fixture(scope="function")
 def ansible_adhoc(request):
     """Return an inventory initialization method."""
@@ -15,16 +23,59 @@ def ansible_adhoc(request):
 
 
 @pytest.fixture(scope="function")
-def ansible_module(ansible_adhoc):
-    """Return a subclass of BaseModuleDispatcher."""
-    host_mgr = ansible_adhoc()
-    return getattr(host_mgr, host_mgr.options["host_pattern"])
+def ansible_module(request, ansible_adhoc):
+    """Return a subclass of BaseModuleDispatcher, shared within `--ansible-fixture-scope`."""
+    plugin = request.config.pluginmanager.getplugin("ansible")
+    return plugin.get_scoped(
+        request, "ansible_module", partial(_ansible_module, ansible_adhoc)
+    )
+
+
+@pytest.fixture(scope="function")
+def ansible_facts(request, ansible_module):
+    """Return ansible_facts dictionary, shared within `--ansible-fixture-scope`."""
+    plugin = request.config.pluginmanager.getplugin("ansible")
+    return plugin.get_scoped(
+        request, "ansible_facts", partial(plugin.facts_cache.gather, ansible_module)
+    )
+
+
+@pytest.fixture(scope="function")
+def ansible_module_session(request, ansible_adhoc):
+    """Return a subclass of BaseModuleDispatcher shared by the whole session."""
+    plugin = request.config.pluginmanager.getplugin("ansible")
+    return plugin.get_scoped(
+        request,
+        "ansible_module",
+        partial(_ansible_module, ansible_adhoc),
+        scope="session",
+    )
+
+
+@pytest.fixture(scope="function")
+def ansible_facts_session(request, ansible_module_session):
+    """Return ansible_facts dictionary gathered once for the whole session."""
+    plugin = request.config.pluginmanager.getplugin("ansible")
+    return plugin.get_scoped(
+        request,
+        "ansible_facts",
+        partial(plugin.facts_cache.gather, ansible_module_session),
+        scope="session",
+    )
 
 
 @pytest.fixture(scope="function")
-def ansible_facts(ansible_module):
-    """Return ansible_facts dictionary."""
-    return ansible_module.setup()
+def ansible_host(request):
+    """Return the module dispatcher of the host a test was parametrized with."""
+    plugin = request.config.pluginmanager.getplugin("ansible")
+    return plugin.collection_host_manager()[request.param]
+
+
+@pytest.fixture(scope="function")
+def ansible_group(request):
+    """Return the module dispatcher of the group a test was parametrized with."""
+    plugin = request.config.pluginmanager.getplugin("ansible")
+    return plugin.collection_host_manager()[request.param]
 
 
 @pytest.fixture(scope="function")
@@ -33,10 +84,14 @@ def localhost(request):
     # NOTE: Do not use ansible_adhoc as a dependent fixture since that will assert specific command-line parameters have
     # been supplied.  In the case of localhost, the parameters are provided as kwargs below.
     plugin = request.config.pluginmanager.getplugin("ansible")
-    return plugin.initialize(
-        request.config,
-        request,
-        inventory="localhost,",
-        connection="local",
-        host_pattern="localhost",
-    ).localhost
+
+    def init_localhost():
+        return plugin.initialize(
+            request.config,
+            request,
+            inventory="localhost,",
+            connection="local",
+            host_pattern="localhost",
+        ).localhost
+
+    return plugin.get_scoped(request, "localhost", init_localhost)
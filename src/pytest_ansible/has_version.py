@@ -1,14 +1,90 @@
-import ansible
+"""Ansible version gates, evaluated on first use.
 
-from pkg_resources import parse_version
+Each ``has_ansible_v*`` flag is computed when it is first imported and then
+kept as a module attribute, so importing this module neither imports ansible
+nor a full blown version parser.
+"""
 
+import re
 
-has_ansible_v1 = parse_version(ansible.__version__) < parse_version("2.0.0")
-has_ansible_v2 = parse_version(ansible.__version__) >= parse_version("2.0.0")
-has_ansible_v24 = parse_version(ansible.__version__) >= parse_version("2.4.0")
-has_ansible_v28 = parse_version(ansible.__version__) >= parse_version(
-    "2.8.0.dev0"
-) or parse_version(ansible.__version__) >= parse_version("2.8.0")
-has_ansible_v29 = parse_version(ansible.__version__) >= parse_version("2.9.0")
-has_ansible_v212 = parse_version(ansible.__version__) >= parse_version("2.12.0")
-has_ansible_v213 = parse_version(ansible.__version__) >= parse_version("2.13.0")
+from functools import lru_cache
+
+
+_VERSION_RE = re.compile(
+    r"^\s*v?(?P<release>\d+(?:\.\d+)*)"
+    r"(?:[-_.]?(?P<pre>dev|a|alpha|b|beta|c|rc|pre|preview)[-_.]?(?P<pre_number>\d*))?"
+)
+
+# Pre-releases sort before the final release, development releases first
+_PRE_RELEASE_RANKS = {
+    "dev": 0,
+    "a": 1,
+    "alpha": 1,
+    "b": 2,
+    "beta": 2,
+    "c": 3,
+    "rc": 3,
+    "pre": 3,
+    "preview": 3,
+}
+_FINAL_RELEASE_RANK = 4
+
+
+@lru_cache(maxsize=None)
+def parse_version(version):
+    """Return a tuple ordering `version` strings like PEP 440 release versions.
+
+    Only the release number and the dev, alpha, beta and release candidate
+    markers are considered; post-releases and local versions compare equal to
+    their release.
+    """
+    match = _VERSION_RE.match(version)
+    if match is None:
+        raise ValueError("Invalid version: '%s'" % version)
+
+    release = tuple(int(part) for part in match.group("release").split("."))
+    # 2.13 and 2.13.0 are the same release
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+
+    pre = match.group("pre")
+    if pre is None:
+        return release, (_FINAL_RELEASE_RANK, 0)
+    return release, (_PRE_RELEASE_RANKS[pre], int(match.group("pre_number") or 0))
+
+
+@lru_cache(maxsize=None)
+def ansible_version():
+    """Return the parsed version of the installed ansible."""
+    from ansible.release import __version__
+
+    return parse_version(__version__)
+
+
+def _at_least(version):
+    """Return a gate checking the ansible version is `version` or newer."""
+    return lambda: ansible_version() >= parse_version(version)
+
+
+_GATES = {
+    "has_ansible_v1": lambda: ansible_version() < parse_version("2.0.0"),
+    "has_ansible_v2": _at_least("2.0.0"),
+    "has_ansible_v24": _at_least("2.4.0"),
+    "has_ansible_v28": _at_least("2.8.0.dev0"),
+    "has_ansible_v29": _at_least("2.9.0"),
+    "has_ansible_v212": _at_least("2.12.0"),
+    "has_ansible_v213": _at_least("2.13.0"),
+}
+
+
+def __getattr__(name):
+    """Evaluate and remember the version gate `name`."""
+    if name not in _GATES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = globals()[name] = _GATES[name]()
+    return value
+
+
+def __dir__():
+    """Include the version gates not evaluated yet."""
+    return sorted(set(globals()) | set(_GATES))
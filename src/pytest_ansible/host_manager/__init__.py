@@ -24,22 +24,49 @@ class BaseHostManager(object):
         # Sub-classes should override this value
         self._dispatcher = None
 
+        # Memoized host names, per inventory manager and host pattern
+        self._host_index = dict()
+
         # Initialize ansible inventory manager
         self.initialize_inventory()
 
+    def _list_hosts(self, manager="inventory_manager", host_pattern=None):
+        """Return the names of the hosts of the inventory `manager` matching `host_pattern`.
+
+        Results are memoized until the subset, the restriction or the hosts of the
+        inventory change, so repeated lookups of a pattern do not parse it again.
+        """
+        inventory_manager = self.options[manager]
+        # Inventory managers rebuild their inventory data when refreshed
+        inventory = getattr(inventory_manager, "_inventory", inventory_manager)
+        subset = tuple(getattr(inventory_manager, "_subset", None) or ())
+        restriction = tuple(
+            sorted(getattr(inventory_manager, "_restriction", None) or ())
+        )
+
+        key = (manager, host_pattern)
+        cached = self._host_index.get(key)
+        if (
+            cached is not None
+            and cached[0] is inventory
+            and cached[1] == subset
+            and cached[2] == restriction
+        ):
+            return cached[3]
+
+        if host_pattern is None:
+            hosts = inventory_manager.list_hosts()
+        else:
+            hosts = inventory_manager.list_hosts(host_pattern)
+        names = [getattr(h, "name", h) for h in hosts]
+        self._host_index[key] = (inventory, subset, restriction, names)
+        return names
+
     def get_extra_inventory_hosts(self, host_pattern=None):
         try:
-            if host_pattern is None:
-                extra_inventory_hosts = [
-                    h.name for h in self.options["extra_inventory_manager"].list_hosts()
-                ]
-            else:
-                extra_inventory_hosts = [
-                    h.name
-                    for h in self.options["extra_inventory_manager"].list_hosts(
-                        host_pattern
-                    )
-                ]
+            extra_inventory_hosts = self._list_hosts(
+                "extra_inventory_manager", host_pattern
+            )
         except:
             extra_inventory_hosts = []
         return extra_inventory_hosts
@@ -61,7 +88,7 @@ class BaseHostManager(object):
         """Return whether any matching ansible inventory is found for the provided host_pattern."""
         try:
             return (
-                len(self.options["inventory_manager"].list_hosts(host_pattern)) > 0
+                len(self._list_hosts(host_pattern=host_pattern)) > 0
                 or host_pattern in self.options["inventory_manager"].groups
                 or len(self.get_extra_inventory_hosts(host_pattern)) > 0
                 or host_pattern in self.get_extra_inventory_groups()
@@ -98,11 +125,10 @@ class BaseHostManager(object):
             self.options["host_pattern"] = attr
             return self._dispatcher(**self.options)
 
-    def keys(self):
-        inventory_hosts = [
-            h.name for h in self.options["inventory_manager"].list_hosts()
-        ]
-        extra_inventory_hosts = self.get_extra_inventory_hosts()
+    def keys(self, host_pattern=None):
+        """Return the names of the inventory hosts, optionally matching `host_pattern`."""
+        inventory_hosts = self._list_hosts(host_pattern=host_pattern)
+        extra_inventory_hosts = self.get_extra_inventory_hosts(host_pattern)
         return inventory_hosts + extra_inventory_hosts
 
     def __iter__(self):
@@ -110,9 +136,7 @@ class BaseHostManager(object):
         extra_hosts = self.get_extra_inventory_hosts(
             host_pattern=self.options["host_pattern"]
         )
-        all_hosts = self.options["inventory_manager"].list_hosts(
-            self.options["host_pattern"]
-        )
+        all_hosts = self._list_hosts(host_pattern=self.options["host_pattern"])
         # Return only the name (ala .keys()
         # return iter(self.options['inventory_manager'].list_hosts(self.options['host_pattern']))
         # Return a BaseHostManager instance initialized for each host in the inventory
@@ -122,9 +146,7 @@ class BaseHostManager(object):
 
     def __len__(self):
         """Return the number of inventory hosts."""
-        return len(self.options["inventory_manager"].list_hosts()) + len(
-            self.get_extra_inventory_hosts()
-        )
+        return len(self._list_hosts()) + len(self.get_extra_inventory_hosts())
 
     def __contains__(self, item):
         """Return whether there is inventory matching the provided `item`."""
@@ -1,11 +1,327 @@
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from ansible.inventory.data import InventoryData
 from ansible.inventory.manager import InventoryManager
+from ansible.module_utils.common.json import AnsibleJSONEncoder
 from ansible.parsing.dataloader import DataLoader
 from ansible.vars.manager import VariableManager
+from ansible.vars.plugins import get_vars_from_inventory_sources
 
 from pytest_ansible.host_manager import BaseHostManager
 from pytest_ansible.module_dispatcher.v213 import ModuleDispatcherV213
 
 
+def load_inventory(sources):
+    """Return a new loader, inventory manager and variable manager for `sources`."""
+    loader = DataLoader()
+    inventory_manager = InventoryManager(loader=loader, sources=sources)
+    variable_manager = VariableManager(loader=loader, inventory=inventory_manager)
+    return loader, inventory_manager, variable_manager
+
+
+def copy_inventory(inventory):
+    """Return a copy of the InventoryData `inventory`.
+
+    Hosts and groups are copied along with their variables and relations, so
+    plays running `add_host` or `group_by` on the copy leave `inventory` as it
+    was parsed.  Variable values themselves are shared.
+    """
+    copies = {}
+
+    def copy_entity(entity):
+        # Host and Group pickle themselves through serialize(), which copies
+        # the groups of a host, so copy their attributes instead
+        if id(entity) not in copies:
+            copied = entity.__class__.__new__(entity.__class__)
+            copied.__dict__.update(entity.__dict__)
+            copied.vars = dict(entity.vars)
+            copies[id(entity)] = copied
+        return copies[id(entity)]
+
+    copied = InventoryData.__new__(InventoryData)
+    copied.__dict__.update(inventory.__dict__)
+    copied.groups = dict(
+        (name, copy_entity(group)) for name, group in inventory.groups.items()
+    )
+    copied.hosts = dict(
+        (name, copy_entity(host)) for name, host in inventory.hosts.items()
+    )
+    if inventory.localhost is not None:
+        copied.localhost = copy_entity(inventory.localhost)
+    copied._groups_dict_cache = {}
+    copied.processed_sources = list(inventory.processed_sources)
+
+    for group in inventory.groups.values():
+        group_copy = copy_entity(group)
+        group_copy.hosts = [copy_entity(host) for host in group.hosts]
+        if group._hosts is not None:
+            group_copy._hosts = set(group._hosts)
+        group_copy.child_groups = [copy_entity(child) for child in group.child_groups]
+        group_copy.parent_groups = [
+            copy_entity(parent) for parent in group.parent_groups
+        ]
+        group_copy._hosts_cache = None
+    for host in list(inventory.hosts.values()) + [inventory.localhost]:
+        if host is not None:
+            copy_entity(host).groups = [copy_entity(group) for group in host.groups]
+    return copied
+
+
+def share_inventory(inventory_manager):
+    """Return a new loader, inventory manager and variable manager for the inventory of `inventory_manager`.
+
+    The new inventory manager holds a copy of the parsed hosts and groups, see
+    copy_inventory, so neither the plays run through it nor its subset and
+    restriction, nor the facts and variables set through the new variable
+    manager, affect other inventory managers.
+    """
+    loader = DataLoader()
+    shared = InventoryManager(
+        loader=loader, sources=inventory_manager._sources, parse=False
+    )
+    shared._inventory = copy_inventory(inventory_manager._inventory)
+    variable_manager = VariableManager(loader=loader, inventory=shared)
+    return loader, shared, variable_manager
+
+
+def dump_inventory(inventory_manager, loader):
+    """Return the groups and hosts of `inventory_manager`, with their variables.
+
+    The inventory variables of every group and host are kept apart from the
+    variables vars plugins, such as host_group_vars, load for them from the
+    inventory sources while running tasks, so `restore_inventory` rebuilds the
+    inventory without its sources and with the same variable precedence.
+    """
+    sources = inventory_manager._sources
+
+    def entity_vars(entity):
+        return dict(
+            vars=dict(entity.vars),
+            plugin_vars=get_vars_from_inventory_sources(
+                loader, sources, [entity], "task"
+            ),
+        )
+
+    groups = {}
+    for name, group in inventory_manager.groups.items():
+        groups[name] = entity_vars(group)
+        groups[name].update(
+            hosts=[host.name for host in group.hosts],
+            children=[child.name for child in group.child_groups],
+        )
+    return dict(
+        groups=groups,
+        hosts=dict(
+            (name, entity_vars(host)) for name, host in inventory_manager.hosts.items()
+        ),
+    )
+
+
+def _write_plugin_vars(data):
+    """Write the vars plugin variables of the `dump_inventory` data to group_vars and host_vars files.
+
+    Return the directory holding them, to be used as the inventory source the
+    host_group_vars plugin loads them from with their usual precedence, or None
+    when there are no such variables.
+    """
+    entities = [
+        (subdir, name, entity["plugin_vars"])
+        for subdir, key in (("group_vars", "groups"), ("host_vars", "hosts"))
+        for name, entity in data[key].items()
+        if entity["plugin_vars"]
+    ]
+    if not entities:
+        return None
+
+    directory = tempfile.mkdtemp(prefix="pytest-ansible-inventory-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    for subdir, name, variables in entities:
+        path = os.path.join(directory, subdir)
+        if not os.path.isdir(path):
+            os.mkdir(path)
+        with open(os.path.join(path, name + ".json"), "w") as f:
+            json.dump(variables, f, cls=AnsibleJSONEncoder)
+    return directory
+
+
+def restore_inventory(data):
+    """Return a new loader, inventory manager and variable manager holding the `dump_inventory` data."""
+    loader = DataLoader()
+    directory = _write_plugin_vars(data)
+    # There is nothing to parse, which would only warn about it
+    inventory_manager = InventoryManager(
+        loader=loader, sources=[directory] if directory else [], parse=False
+    )
+    inventory = inventory_manager._inventory
+    for name in data["groups"]:
+        inventory.add_group(name)
+    for name, group in data["groups"].items():
+        for child in group["children"]:
+            inventory.add_child(name, child)
+        for host in group["hosts"]:
+            inventory.add_host(host, group=name)
+        for key, value in group["vars"].items():
+            inventory.set_variable(name, key, value)
+    for name, host in data["hosts"].items():
+        inventory.add_host(name)
+        for key, value in host["vars"].items():
+            inventory.set_variable(name, key, value)
+    inventory.reconcile_inventory()
+    variable_manager = VariableManager(loader=loader, inventory=inventory_manager)
+    return loader, inventory_manager, variable_manager
+
+
+class InventoryCache(object):
+    """Share parsed inventories between host managers.
+
+    Parsing inventory files and running dynamic inventory scripts happens every
+    time a host manager is created, which is once per test for the function
+    scoped fixtures.  The cache hands out inventory managers holding copies of
+    the same parsed inventory for the same sources, until one of the files
+    making up the inventory is modified.
+    """
+
+    # Version of the dump_inventory format of persisted snapshots, older
+    # snapshots merged the vars plugin variables into the inventory variables
+    snapshot_version = 2
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._lock = threading.Lock()
+        self._inventories = {}
+        # pytest cache persisting inventory snapshots, see persist()
+        self._store = None
+
+    def __len__(self):
+        """Return the number of cached inventories."""
+        return len(self._inventories)
+
+    @staticmethod
+    def _make_key(sources):
+        """Return a hashable key describing the inventory `sources`."""
+        if isinstance(sources, (list, tuple, set)):
+            return tuple(sources)
+        return (sources,)
+
+    @staticmethod
+    def _source_paths(source):
+        """Return the files and directories read when parsing the inventory `source`."""
+        if not isinstance(source, str):
+            return []
+        path = os.path.abspath(os.path.expanduser(source))
+        if not os.path.exists(path):
+            # A host list such as 'localhost,'
+            return []
+        paths = [path]
+        if os.path.isfile(path):
+            # Variables next to an inventory file are loaded with it
+            basedir = os.path.dirname(path)
+            paths.append(os.path.join(basedir, "group_vars"))
+            paths.append(os.path.join(basedir, "host_vars"))
+        return paths
+
+    def _source_files(self, key):
+        """Return every file making up the inventory `key`."""
+        files = []
+        for source in key:
+            for path in self._source_paths(source):
+                for dirpath, dirnames, filenames in os.walk(path):
+                    dirnames.sort()
+                    for filename in sorted(filenames):
+                        files.append(os.path.join(dirpath, filename))
+                if os.path.isfile(path):
+                    files.append(path)
+        return files
+
+    def _fingerprint(self, key):
+        """Return the modification times of every file making up the inventory `key`."""
+        return tuple(
+            (filename, os.stat(filename).st_mtime_ns)
+            for filename in self._source_files(key)
+        )
+
+    def _digest(self, key):
+        """Return a hash of the inventory `key` and of the contents of its files."""
+        digest = hashlib.sha256(repr(key).encode("utf-8"))
+        for filename in self._source_files(key):
+            digest.update(filename.encode("utf-8"))
+            with open(filename, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def persist(self, cache):
+        """Keep snapshots of the parsed inventories in the pytest `cache` between sessions.
+
+        Sessions finding a snapshot of an inventory whose files did not change
+        restore it instead of parsing the inventory.
+        """
+        self._store = cache
+
+    def _load(self, key, sources):
+        """Return the loader, inventory manager and variable manager for `sources`."""
+        if self._store is None:
+            return load_inventory(sources)
+
+        name = "ansible/inventory/%s" % (
+            hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        )
+        digest = self._digest(key)
+        snapshot = self._store.get(name, None)
+        if (
+            snapshot is not None
+            and snapshot.get("version") == self.snapshot_version
+            and snapshot.get("digest") == digest
+        ):
+            return restore_inventory(snapshot["data"])
+
+        loaded = load_inventory(sources)
+        data = dump_inventory(loaded[1], loaded[0])
+        # Variables may hold ansible types the pytest cache cannot serialize
+        data = json.loads(json.dumps(data, cls=AnsibleJSONEncoder))
+        self._store.set(
+            name, dict(version=self.snapshot_version, digest=digest, data=data)
+        )
+        return loaded
+
+    def get(self, sources):
+        """Return a new loader, inventory manager and variable manager for `sources`.
+
+        The inventory is parsed again when any of its files changed since it was
+        cached.  Each call gets its own copy of the hosts and groups, see
+        share_inventory.
+        """
+        key = self._make_key(sources)
+        fingerprint = self._fingerprint(key)
+        with self._lock:
+            cached = self._inventories.get(key)
+            if cached is None or cached[0] != fingerprint:
+                cached = (fingerprint, self._load(key, sources))
+                self._inventories[key] = cached
+        return share_inventory(cached[1][1])
+
+    def restore(self, sources, data):
+        """Cache the inventory of `sources` from its `dump_inventory` data instead of parsing it."""
+        key = self._make_key(sources)
+        fingerprint = self._fingerprint(key)
+        restored = restore_inventory(data)
+        with self._lock:
+            self._inventories[key] = (fingerprint, restored)
+
+    def clear(self):
+        """Forget every cached inventory."""
+        with self._lock:
+            self._inventories.clear()
+
+
+inventory_cache = InventoryCache()
+
+
 class HostManagerV213(BaseHostManager):
     """Fixme."""
 
@@ -15,20 +331,19 @@ class HostManagerV213(BaseHostManager):
         self._dispatcher = ModuleDispatcherV213
 
     def initialize_inventory(self):
-        self.options["loader"] = DataLoader()
-        self.options["inventory_manager"] = InventoryManager(
-            loader=self.options["loader"], sources=self.options["inventory"]
-        )
-        self.options["variable_manager"] = VariableManager(
-            loader=self.options["loader"], inventory=self.options["inventory_manager"]
-        )
+        if self.options.get("inventory_cache", True):
+            get_inventory = inventory_cache.get
+        else:
+            get_inventory = load_inventory
+
+        (
+            self.options["loader"],
+            self.options["inventory_manager"],
+            self.options["variable_manager"],
+        ) = get_inventory(self.options["inventory"])
         if "extra_inventory" in self.options:
-            self.options["extra_loader"] = DataLoader()
-            self.options["extra_inventory_manager"] = InventoryManager(
-                loader=self.options["extra_loader"],
-                sources=self.options["extra_inventory"],
-            )
-            self.options["extra_variable_manager"] = VariableManager(
-                loader=self.options["extra_loader"],
-                inventory=self.options["extra_inventory_manager"],
-            )
+            (
+                self.options["extra_loader"],
+                self.options["extra_inventory_manager"],
+                self.options["extra_variable_manager"],
+            ) = get_inventory(self.options["extra_inventory"])
@@ -0,0 +1,85 @@
+"""Snapshot the inventory resolved for test collection."""
+
+from types import MappingProxyType
+
+
+class InventorySnapshot(object):
+
+    """Frozen index of the hosts and groups of the configured inventories.
+
+    `hosts` holds the host names of both inventories, while `groups` and
+    `extra_groups` map the group names of the inventory and of the extra
+    inventory to the names of their hosts.  A snapshot only holds names, so
+    `to_dict()` and `from_dict()` serialize it as plain JSON types.
+    """
+
+    __slots__ = ("hosts", "groups", "extra_groups")
+
+    def __init__(self, hosts=(), groups=None, extra_groups=None):
+        """Freeze the provided host and group names."""
+        object.__setattr__(self, "hosts", tuple(hosts))
+        for name, value in (("groups", groups), ("extra_groups", extra_groups)):
+            value = dict(
+                (group, tuple(group_hosts))
+                for group, group_hosts in (value or {}).items()
+            )
+            object.__setattr__(self, name, MappingProxyType(value))
+
+    @staticmethod
+    def _index_groups(inventory_manager):
+        """Return the host names of every group of `inventory_manager`, by group name."""
+        return dict(
+            (name, [host.name for host in group.get_hosts()])
+            for name, group in sorted(inventory_manager.groups.items())
+        )
+
+    @classmethod
+    def from_host_manager(cls, host_manager):
+        """Return a snapshot of the inventories of `host_manager`."""
+        extra_inventory_manager = host_manager.options.get("extra_inventory_manager")
+        return cls(
+            hosts=host_manager.keys(),
+            groups=cls._index_groups(host_manager.options["inventory_manager"]),
+            extra_groups=cls._index_groups(extra_inventory_manager)
+            if extra_inventory_manager is not None
+            else None,
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Return the snapshot serialized by `to_dict()`."""
+        return cls(**data)
+
+    def to_dict(self):
+        """Return the snapshot as a dictionary of lists."""
+        return dict(
+            hosts=list(self.hosts),
+            groups=dict((name, list(hosts)) for name, hosts in self.groups.items()),
+            extra_groups=dict(
+                (name, list(hosts)) for name, hosts in self.extra_groups.items()
+            ),
+        )
+
+    def group_names(self):
+        """Return the names of the groups of both inventories."""
+        return list(self.groups) + list(self.extra_groups)
+
+    def __eq__(self, other):
+        """Return whether `other` is a snapshot of the same inventories."""
+        if not isinstance(other, InventorySnapshot):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        """Return whether `other` is a snapshot of different inventories."""
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __setattr__(self, name, value):
+        """Refuse to modify the snapshot."""
+        raise AttributeError("InventorySnapshot is read-only")
+
+    def __reduce__(self):
+        """Support copying and pickling despite being read-only."""
+        return (self.__class__.from_dict, (self.to_dict(),))
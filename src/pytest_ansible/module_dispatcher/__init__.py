@@ -1,8 +1,13 @@
 """Define BaseModuleDispatcher class."""
 
+import asyncio
+
+from contextlib import nullcontext
+from functools import partial
 from typing import Sequence
 
 from pytest_ansible.errors import AnsibleModuleError
+from pytest_ansible.results import DeferredAdHocResult
 
 
 class BaseModuleDispatcher(object):
@@ -43,6 +48,40 @@ class BaseModuleDispatcher(object):
             self.options["module_name"] = name
             return self._run
 
+    def with_options(self, **options):
+        """Return a copy of this dispatcher with `options` overridden, e.g. `forks=50`."""
+        return self.__class__(**dict(self.options, **options))
+
+    @property
+    def async_(self):
+        """Return an AsyncModuleDispatcher whose module calls are awaitable."""
+        return AsyncModuleDispatcher(self)
+
+    @property
+    def stream(self):
+        """Return a StreamingModuleDispatcher whose module calls yield results per host."""
+        return StreamingModuleDispatcher(self)
+
+    def submit(self, name, *module_args, **complex_args):
+        """Run the ansible module `name` in the background.
+
+        Return a `concurrent.futures.Future` of the AdHocResult.  Raise
+        `AnsibleModuleError` when no such module exists.
+        """
+        from pytest_ansible.executor import dispatch_executor
+
+        if not self.has_module(name):
+            raise AnsibleModuleError(
+                "The module {0} was not found in configured module paths.".format(name)
+            )
+        # Run on a copy, concurrent calls must not share `module_name`
+        dispatcher = self.__class__(**dict(self.options, module_name=name))
+        return dispatch_executor.submit(dispatcher._run, *module_args, **complex_args)
+
+    def batch(self):
+        """Return a ModuleBatch running the module calls queued on it as a single play."""
+        return ModuleBatch(self)
+
     def check_required_kwargs(self, **kwargs):
         """Raise a TypeError if any required kwargs are missing."""
         for kwarg in self.required_kwargs:
@@ -53,6 +92,154 @@ class BaseModuleDispatcher(object):
         """Return whether ansible provides the requested module."""
         raise RuntimeError("Must be implemented by a sub-class")
 
+    def _call_context(self):
+        """Return the context manager a module call runs in."""
+        return nullcontext()
+
     def _run(self, *args, **kwargs):
         """Raise a runtime error, unless implemented by sub-classes."""
         raise RuntimeError("Must be implemented by a sub-class")
+
+    def _run_batch(self, calls):
+        """Raise a runtime error, unless implemented by sub-classes."""
+        raise RuntimeError("Must be implemented by a sub-class")
+
+    def _stream(self, module_name, *module_args, **complex_args):
+        """Raise a runtime error, unless implemented by sub-classes."""
+        raise RuntimeError("Must be implemented by a sub-class")
+
+
+class AsyncModuleDispatcher(object):
+
+    """Expose the ansible modules of a dispatcher as coroutine functions.
+
+    Awaiting `ansible_module.async_.command("uptime")` returns the AdHocResult
+    of the call, which runs in the background, so `asyncio.gather` runs several
+    calls at once.
+    """
+
+    def __init__(self, dispatcher):
+        """Wrap `dispatcher`."""
+        self._dispatcher = dispatcher
+
+    def __getattr__(self, name):
+        """Return a coroutine function running the ansible module matching the provided `name`.
+
+        Raise `AnsibleModuleError` when no such module exists.
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if not self._dispatcher.has_module(name):
+            raise AnsibleModuleError(
+                "The module {0} was not found in configured module paths.".format(name)
+            )
+        return partial(self._run, name)
+
+    async def _run(self, module_name, *module_args, **complex_args):
+        """Await the AdHocResult of the module call run in the background."""
+        return await asyncio.wrap_future(
+            self._dispatcher.submit(module_name, *module_args, **complex_args)
+        )
+
+
+class StreamingModuleDispatcher(object):
+
+    """Expose the ansible modules of a dispatcher as generators of host results.
+
+    Iterating over `ansible_module.stream.command("uptime")` yields a
+    `(host, ModuleResult)` pair as soon as each host returned.
+    """
+
+    def __init__(self, dispatcher):
+        """Wrap `dispatcher`."""
+        self._dispatcher = dispatcher
+
+    def __getattr__(self, name):
+        """Return a generator function running the ansible module matching the provided `name`.
+
+        Raise `AnsibleModuleError` when no such module exists.
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if not self._dispatcher.has_module(name):
+            raise AnsibleModuleError(
+                "The module {0} was not found in configured module paths.".format(name)
+            )
+        return partial(self._dispatcher._stream, name)
+
+
+class ModuleBatch(object):
+
+    """Queue module calls and run them as the tasks of a single play.
+
+    Each call returns a DeferredAdHocResult which resolves once the batch has
+    run, which happens when leaving the `with` block::
+
+        with ansible_module.batch() as batch:
+            uptime = batch.command("uptime")
+            passwd = batch.stat(path="/etc/passwd")
+        assert uptime.localhost.is_successful
+    """
+
+    def __init__(self, dispatcher):
+        """Initialize an empty batch of module calls for `dispatcher`."""
+        self._dispatcher = dispatcher
+        self._calls = []
+        self._results = []
+
+    def __enter__(self):
+        """Return the batch."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Run the queued module calls, unless the `with` block raised."""
+        if exc_type is None:
+            self._flush()
+
+    def __len__(self):
+        """Return the number of queued module calls."""
+        return len(self._calls)
+
+    def __getattr__(self, name):
+        """Return a function queueing a call of the ansible module matching the provided `name`.
+
+        Raise `AnsibleModuleError` when no such module exists.
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if not self._dispatcher.has_module(name):
+            raise AnsibleModuleError(
+                "The module {0} was not found in configured module paths.".format(name)
+            )
+        return partial(self._queue, name)
+
+    def _queue(self, module_name, *module_args, **complex_args):
+        """Queue a module call, returning its DeferredAdHocResult."""
+        # Assemble module argument string
+        if module_args:
+            complex_args.update(dict(_raw_params=" ".join(module_args)))
+
+        result = DeferredAdHocResult()
+        self._calls.append((module_name, complex_args))
+        self._results.append(result)
+        return result
+
+    def _flush(self):
+        """Run the queued module calls and resolve their results.
+
+        Raise the first connection failure once every result is resolved.
+        """
+        calls, self._calls = self._calls, []
+        deferred, self._results = self._results, []
+        if not calls:
+            return
+
+        error = None
+        for result, outcome in zip(deferred, self._dispatcher._run_batch(calls)):
+            if isinstance(outcome, Exception):
+                result._resolve(error=outcome)
+                error = error or outcome
+            else:
+                result._resolve(outcome)
+        if error is not None:
+            raise error
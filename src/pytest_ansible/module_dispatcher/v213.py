@@ -1,19 +1,29 @@
+import os
+import queue
 import sys
+import threading
 import warnings
 
+from contextlib import contextmanager
+
 import ansible.constants
 import ansible.errors
 import ansible.utils
 
+from ansible import context
 from ansible.cli.adhoc import AdHocCLI
-from ansible.executor.task_queue_manager import TaskQueueManager
 from ansible.playbook.play import Play
 from ansible.plugins.callback import CallbackBase
+from ansible.utils.context_objects import GlobalCLIArgs
+from ansible.utils.helpers import pct_to_int
 
 from pytest_ansible.errors import AnsibleConnectionFailure
+from pytest_ansible.executor import start_thread
+from pytest_ansible.executor import task_queue_manager_pool
 from pytest_ansible.has_version import has_ansible_v213
 from pytest_ansible.module_dispatcher.v2 import ModuleDispatcherV2
 from pytest_ansible.results import AdHocResult
+from pytest_ansible.results import ModuleResult
 
 
 # pylint: disable=ungrouped-imports
@@ -30,27 +40,277 @@ class ResultAccumulator(CallbackBase):
     """Fixme."""
 
     def __init__(self, *args, **kwargs):
-        """Initialize object."""
+        """Initialize object, calling `listener(host, result)` for every host result."""
+        self.listener = kwargs.pop("listener", None)
         super(ResultAccumulator, self).__init__(*args, **kwargs)
         self.contacted = {}
         self.unreachable = {}
+        # Called on the first failed or unreachable host when failing fast
+        self.abort = None
+        self.aborted = False
+
+    def _notify(self, host, result):
+        if self.listener is not None:
+            self.listener(host, result)
+
+    def _abort(self):
+        if self.abort is not None:
+            abort, self.abort = self.abort, None
+            self.aborted = True
+            abort()
 
     def v2_runner_on_failed(self, result, *args, **kwargs):
         result2 = dict(failed=True)
         result2.update(result._result)
         self.contacted[result._host.get_name()] = result2
+        self._notify(result._host.get_name(), result2)
+        self._abort()
 
     def v2_runner_on_ok(self, result):
         self.contacted[result._host.get_name()] = result._result
+        self._notify(result._host.get_name(), result._result)
 
     def v2_runner_on_unreachable(self, result):
-        self.unreachable[result._host.get_name()] = result._result
+        result2 = dict(unreachable=True)
+        result2.update(result._result)
+        self.unreachable[result._host.get_name()] = result2
+        self._notify(result._host.get_name(), result2)
+        self._abort()
 
     @property
     def results(self):
         return dict(contacted=self.contacted, unreachable=self.unreachable)
 
 
+class BatchResultAccumulator(ResultAccumulator):
+    """Accumulate results per task of a batched pseudo-play."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize object."""
+        super(BatchResultAccumulator, self).__init__(*args, **kwargs)
+        self.tasks = {}
+
+    def task_results(self, name):
+        """Return the contacted and unreachable results of the task called `name`."""
+        return self.tasks.setdefault(name, dict(contacted={}, unreachable={}))
+
+    def v2_runner_on_failed(self, result, *args, **kwargs):
+        super(BatchResultAccumulator, self).v2_runner_on_failed(result, *args, **kwargs)
+        host = result._host.get_name()
+        self.task_results(result.task_name)["contacted"][host] = self.contacted[host]
+
+    def v2_runner_on_ok(self, result):
+        super(BatchResultAccumulator, self).v2_runner_on_ok(result)
+        host = result._host.get_name()
+        self.task_results(result.task_name)["contacted"][host] = self.contacted[host]
+
+    def v2_runner_on_unreachable(self, result):
+        super(BatchResultAccumulator, self).v2_runner_on_unreachable(result)
+        host = result._host.get_name()
+        self.task_results(result.task_name)["unreachable"][host] = self.unreachable[
+            host
+        ]
+
+
+class CLIContextCache(object):
+    """Populate Ansible's global CLI context from dispatcher options.
+
+    Ansible reads connection and privilege escalation settings from the global
+    `context.CLIARGS`, which is only filled by parsing a command line.  Parsing a
+    fake `ansible` command line on every module call is expensive, so it is only
+    done again when the options that end up in the context change.
+    """
+
+    cli_options = (
+        "connection",
+        "user",
+        "become",
+        "become_method",
+        "become_user",
+        "module_path",
+    )
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._lock = threading.Lock()
+        self._key = None
+        self._cliargs = None
+        self._verbosity = None
+
+    @property
+    def verbosity(self):
+        """Return the `-v` flag pytest was called with, if any."""
+        if self._verbosity is None:
+            self._verbosity = ""
+            for verbosity_syntax in ("-v", "-vv", "-vvv", "-vvvv", "-vvvvv"):
+                if verbosity_syntax in sys.argv:
+                    self._verbosity = verbosity_syntax
+                    break
+        return self._verbosity
+
+    def _make_key(self, options):
+        """Return the values of `options` that end up in the CLI context."""
+        key = [self.verbosity]
+        for argument in self.cli_options:
+            arg_value = options.get(argument)
+            if isinstance(arg_value, (list, tuple, set)):
+                arg_value = tuple(arg_value)
+            key.append(arg_value)
+        return tuple(key)
+
+    def load(self, options):
+        """Parse a fake command line for `options` unless it is already loaded."""
+        key = self._make_key(options)
+        with self._lock:
+            if key == self._key and context.CLIARGS is self._cliargs:
+                return
+
+            # Pass along cli options
+            args = ["pytest-ansible"]
+            if self.verbosity:
+                args.append(self.verbosity)
+            args.extend([options["host_pattern"]])
+            for argument in self.cli_options:
+                arg_value = options.get(argument)
+                argument = argument.replace("_", "-")
+
+                if arg_value in (None, False):
+                    continue
+
+                if arg_value is True:
+                    args.append("--{0}".format(argument))
+                else:
+                    args.append("--{0}={1}".format(argument, arg_value))
+
+            # GlobalCLIArgs is a singleton, drop the previous context so parsing
+            # replaces it instead of returning the stale instance
+            GlobalCLIArgs._Singleton__instance = None
+
+            # Use Ansible's own adhoc cli to parse the fake command line we created and then save it
+            # into Ansible's global context
+            adhoc = AdHocCLI(args)
+            adhoc.parse()
+
+            # And now we'll never speak of this again
+            del adhoc
+
+            self._key = key
+            self._cliargs = context.CLIARGS
+
+
+cli_context = CLIContextCache()
+
+
+class CallGate(object):
+    """Only let module calls agreeing on process-wide ansible state run concurrently.
+
+    Ansible reads the CLI context of a call from the global `context.CLIARGS`,
+    and the hosts it runs on from an inventory manager shared with other calls.
+    A call whose key differs from the key of the running calls waits until they
+    are done, and an exclusive call runs alone.
+    """
+
+    def __init__(self):
+        """Initialize a gate without running calls."""
+        self._condition = threading.Condition()
+        self._key = None
+        self._exclusive = False
+        self._running = 0
+
+    @contextmanager
+    def enter(self, key, exclusive=False):
+        """Wait until a call described by `key` may run, and run it in the block."""
+        with self._condition:
+            while self._running and (exclusive or self._exclusive or key != self._key):
+                self._condition.wait()
+            self._key = key
+            self._exclusive = exclusive
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running -= 1
+                if not self._running:
+                    self._condition.notify_all()
+
+
+call_gate = CallGate()
+
+
+class ModuleResolver(object):
+    """Remember which module names the module loader resolves.
+
+    Looking a module up walks the collection and plugin search paths, and
+    registering a module path invalidates the loader caches, so both are
+    done at most once per session.  Unknown names are remembered too, until a
+    new module path is registered.
+    """
+
+    def __init__(self):
+        """Initialize an empty resolver."""
+        self._lock = threading.Lock()
+        self._paths = set()
+        self._modules = {}
+
+    def add_paths(self, paths):
+        """Register the module `paths` not registered yet with the module loader."""
+        if not isinstance(paths, (list, tuple, set)):
+            paths = [paths]
+        with self._lock:
+            for path in paths:
+                if path in self._paths:
+                    continue
+                module_loader.add_directory(path)
+                self._paths.add(path)
+                # A newly registered path may provide modules not found before
+                self._modules = {
+                    name: found for name, found in self._modules.items() if found
+                }
+
+    def has_module(self, name):
+        """Return whether the module loader finds a module called `name`."""
+        found = self._modules.get(name)
+        if found is None:
+            found = module_loader.has_plugin(name)
+            with self._lock:
+                self._modules[name] = found
+        return found
+
+    def clear(self):
+        """Forget every resolved module name."""
+        with self._lock:
+            self._modules = {}
+
+
+module_resolver = ModuleResolver()
+
+
+def serialized_batches(play, inventory):
+    """Return the lists of hosts `play` runs on one after another, following its `serial`.
+
+    This mirrors PlaybookExecutor: every `serial` entry is a host count or a
+    percentage of the play hosts, and the last entry repeats until every host
+    got a batch.
+    """
+    all_hosts = inventory.get_hosts(play.hosts, order=play.order)
+    num_hosts = len(all_hosts)
+    serial_batch_list = play.serial
+    if not isinstance(serial_batch_list, (list, tuple)):
+        serial_batch_list = [serial_batch_list]
+
+    batches = []
+    index = 0
+    while all_hosts:
+        batch_size = pct_to_int(serial_batch_list[index], num_hosts)
+        if batch_size <= 0:
+            batch_size = len(all_hosts)
+        batches.append(all_hosts[:batch_size])
+        all_hosts = all_hosts[batch_size:]
+        index = min(index + 1, len(serial_batch_list) - 1)
+    return batches
+
+
 class ModuleDispatcherV213(ModuleDispatcherV2):
     """Pass."""
 
@@ -66,21 +326,37 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
         # Make sure we parse module_path and pass it to the loader,
         # otherwise, only built-in modules will work.
         if "module_path" in self.options:
-            paths = self.options["module_path"]
-            if isinstance(paths, (list, tuple, set)):
-                for path in paths:
-                    module_loader.add_directory(path)
-            else:
-                module_loader.add_directory(paths)
-
-        return module_loader.has_plugin(name)
-
-    def _run(self, *module_args, **complex_args):
-        """Execute an ansible adhoc command returning the result in a AdhocResult object."""
-        # Assemble module argument string
-        if module_args:
-            complex_args.update(dict(_raw_params=" ".join(module_args)))
+            module_resolver.add_paths(self.options["module_path"])
+
+        return module_resolver.has_module(name)
+
+    @staticmethod
+    def _run_play(play, stdout_callback, fail_fast=False, **kwargs):
+        """Run `play` on a pooled task queue manager reporting to `stdout_callback`.
+
+        With `fail_fast`, the task queue manager stops dispatching the play to
+        more hosts as soon as a host fails or is unreachable.  A play with
+        `serial` runs on one batch of hosts after another.
+        """
+        with task_queue_manager_pool.lease(stdout_callback, **kwargs) as tqm:
+            if fail_fast:
+                stdout_callback.abort = tqm.terminate
+            if not play.serial:
+                tqm.run(play)
+                return
+
+            inventory = kwargs["inventory"]
+            try:
+                for batch in serialized_batches(play, inventory):
+                    inventory.restrict_to_hosts(batch)
+                    tqm.run(play)
+                    if stdout_callback.aborted:
+                        break
+            finally:
+                inventory.remove_restriction()
 
+    def _prepare_run(self):
+        """Assert hosts match the requested pattern and load the CLI context."""
         # Assert hosts matching the provided pattern exist
         hosts = self.options["inventory_manager"].list_hosts()
         if "extra_inventory_manager" in self.options:
@@ -106,79 +382,86 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
                 "Specified hosts and/or --limit does not match any hosts."
             )
 
-        # Pass along cli options
-        args = ["pytest-ansible"]
-        verbosity = None
-        for verbosity_syntax in ("-v", "-vv", "-vvv", "-vvvv", "-vvvvv"):
-            if verbosity_syntax in sys.argv:
-                verbosity = verbosity_syntax
-                break
-        if verbosity is not None:
-            args.append(verbosity_syntax)
-        args.extend([self.options["host_pattern"]])
-        for argument in (
-            "connection",
-            "user",
-            "become",
-            "become_method",
-            "become_user",
-            "module_path",
-        ):
-            arg_value = self.options.get(argument)
-            argument = argument.replace("_", "-")
-
-            if arg_value in (None, False):
-                continue
-
-            if arg_value is True:
-                args.append("--{0}".format(argument))
-            else:
-                args.append("--{0}={1}".format(argument, arg_value))
-
-        # Use Ansible's own adhoc cli to parse the fake command line we created and then save it
-        # into Ansible's global context
-        adhoc = AdHocCLI(args)
-        adhoc.parse()
-
-        # And now we'll never speak of this again
-        del adhoc
+        # Populate Ansible's global context with the cli options of this call
+        cli_context.load(self.options)
+
+    def _call_context(self):
+        """Return the context manager a module call runs in, see CallGate.
+
+        Dispatchers of a host manager share its inventory manager, whose subset
+        a call sets, so concurrent calls must also agree on their subset.  Calls
+        running on `serial` batches restrict the inventory manager to each batch
+        in turn, so they run alone.
+        """
+        key = (cli_context._make_key(self.options), self.options.get("subset"))
+        return call_gate.enter(key, exclusive=bool(self.options.get("serial")))
+
+    def _get_forks(self):
+        """Return the number of hosts a task runs on in parallel.
+
+        `forks="auto"` sizes it from the number of matched hosts and CPUs, as
+        workers mostly wait on remote hosts: four per CPU, but at least five.
+        """
+        forks = self.options.get("forks")
+        if forks != "auto":
+            return int(forks) if forks else None
+
+        num_hosts = 0
+        for name in ("inventory_manager", "extra_inventory_manager"):
+            if name in self.options:
+                num_hosts += len(
+                    self.options[name].list_hosts(self.options["host_pattern"])
+                )
+        return max(1, min(num_hosts, max(5, 4 * (os.cpu_count() or 1))))
+
+    def _run_tasks(self, tasks, accumulator=None):
+        """Run a pseudo-play made of `tasks` against the inventories.
+
+        Return the result accumulators of the inventory and of the extra inventory,
+        the latter being None when no extra inventory is configured.
+        """
+        accumulator = accumulator or ResultAccumulator
+        listener = self.options.get("result_listener")
 
         # Initialize callbacks to capture module JSON responses
-        cb = ResultAccumulator()
+        cb = accumulator(listener=listener)
+        cb_extra = None
+
+        forks = self._get_forks()
 
         kwargs = dict(
             inventory=self.options["inventory_manager"],
             variable_manager=self.options["variable_manager"],
             loader=self.options["loader"],
-            stdout_callback=cb,
             passwords=dict(conn_pass=None, become_pass=None),
+            forks=forks,
         )
 
         # If we have an extra inventory, do the same that we did for the inventory
         if "extra_inventory_manager" in self.options:
-            cb_extra = ResultAccumulator()
+            cb_extra = accumulator(listener=listener)
 
             kwargs_extra = dict(
                 inventory=self.options["extra_inventory_manager"],
                 variable_manager=self.options["extra_variable_manager"],
                 loader=self.options["extra_loader"],
-                stdout_callback=cb_extra,
                 passwords=dict(conn_pass=None, become_pass=None),
+                forks=forks,
             )
 
-        # create a pseudo-play to execute the specified module via a single task
+        # create a pseudo-play to execute the specified tasks
         play_ds = dict(
             name="pytest-ansible",
             hosts=self.options["host_pattern"],
             become=self.options.get("become"),
             become_user=self.options.get("become_user"),
             gather_facts="no",
-            tasks=[
-                dict(
-                    action=dict(module=self.options["module_name"], args=complex_args),
-                ),
-            ],
+            tasks=tasks,
         )
+        if self.options.get("strategy"):
+            play_ds["strategy"] = self.options["strategy"]
+        if self.options.get("serial"):
+            play_ds["serial"] = self.options["serial"]
 
         play = Play().load(
             play_ds,
@@ -192,45 +475,154 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
                 loader=self.options["extra_loader"],
             )
 
-        # now create a task queue manager to execute the play
-        tqm = None
-        try:
-            tqm = TaskQueueManager(**kwargs)
-            tqm.run(play)
-        finally:
-            if tqm:
-                tqm.cleanup()
+        # now run the play(s) using task queue managers leased from the session pool
+        fail_fast = bool(self.options.get("fail_fast"))
+        if "extra_inventory_manager" not in self.options:
+            self._run_play(play, cb, fail_fast=fail_fast, **kwargs)
+        elif self.options.get("parallel_inventories"):
+            futures = [
+                start_thread(self._run_play, play, cb, fail_fast=fail_fast, **kwargs),
+                start_thread(
+                    self._run_play,
+                    play_extra,
+                    cb_extra,
+                    fail_fast=fail_fast,
+                    **kwargs_extra,
+                ),
+            ]
+            for future in futures:
+                future.result()
+        else:
+            self._run_play(play, cb, fail_fast=fail_fast, **kwargs)
+            # Failing fast, the extra inventory is not worth running anymore
+            if not cb.aborted:
+                self._run_play(
+                    play_extra, cb_extra, fail_fast=fail_fast, **kwargs_extra
+                )
 
-        if "extra_inventory_manager" in self.options:
-            tqm_extra = None
-            try:
-                tqm_extra = TaskQueueManager(**kwargs_extra)
-                tqm_extra.run(play_extra)
-            finally:
-                if tqm_extra:
-                    tqm_extra.cleanup()
+        return cb, cb_extra
+
+    def _should_raise(self, unreachable, total):
+        """Return whether `unreachable` hosts out of `total` exceed the on_unreachable policy."""
+        policy = self.options.get("on_unreachable") or "raise"
+        if not unreachable or policy == "partial":
+            return False
+        if policy == "raise":
+            return True
+        return unreachable * 100 > float(str(policy).rstrip("%")) * total
+
+    def _make_result(self, results, extra_results=None):
+        """Return an AdHocResult merging the hosts of both inventories.
+
+        Raise AnsibleConnectionFailure when unreachable hosts exceed the
+        on_unreachable policy, which is to raise on any of them by default.
+        """
+        inventories = [("inventory", results)]
+        if extra_results is not None:
+            inventories.append(("extra inventory", extra_results))
+
+        contacted, unreachable = dict(), dict()
+        for name, inventory_results in inventories:
+            contacted.update(inventory_results["contacted"])
+            unreachable.update(inventory_results["unreachable"])
 
         # Raise exception if host(s) unreachable
-        # FIXME - if multiple hosts were involved, should an exception be raised?
-        if cb.unreachable:
-            raise AnsibleConnectionFailure(
-                "Host unreachable in the inventory",
-                dark=cb.unreachable,
-                contacted=cb.contacted,
+        if self._should_raise(len(unreachable), len(contacted) + len(unreachable)):
+            for name, inventory_results in inventories:
+                if inventory_results["unreachable"]:
+                    raise AnsibleConnectionFailure(
+                        "Host unreachable in the %s" % name,
+                        dark=inventory_results["unreachable"],
+                        contacted=inventory_results["contacted"],
+                    )
+
+        # Success, possibly partial
+        return AdHocResult(contacted=contacted, unreachable=unreachable)
+
+    def _run(self, *module_args, **complex_args):
+        """Execute an ansible adhoc command returning the result in a AdhocResult object."""
+        # Assemble module argument string
+        if module_args:
+            complex_args.update(dict(_raw_params=" ".join(module_args)))
+
+        with self._call_context():
+            self._prepare_run()
+
+            # execute the specified module via a single task
+            cb, cb_extra = self._run_tasks(
+                [
+                    dict(
+                        action=dict(
+                            module=self.options["module_name"], args=complex_args
+                        ),
+                    ),
+                ]
             )
-        if "extra_inventory_manager" in self.options:
-            if cb_extra.unreachable:
-                raise AnsibleConnectionFailure(
-                    "Host unreachable in the extra inventory",
-                    dark=cb_extra.unreachable,
-                    contacted=cb_extra.contacted,
-                )
 
-        # Success!
-        return AdHocResult(
-            contacted=(
-                {**cb.contacted, **cb_extra.contacted}
-                if "extra_inventory_manager" in self.options
-                else cb.contacted
+        return self._make_result(
+            cb.results, cb_extra.results if cb_extra is not None else None
+        )
+
+    def _run_batch(self, calls):
+        """Execute queued `(module_name, complex_args)` calls as tasks of a single play.
+
+        Return an AdHocResult, or the AnsibleConnectionFailure to raise, per call.
+        """
+        # Every call gets its own named task, and failures or unreachable hosts
+        # must not keep the remaining calls from running on a host
+        tasks = [
+            dict(
+                name="pytest-ansible-batch-%d" % index,
+                action=dict(module=module_name, args=complex_args),
+                ignore_errors=True,
+                ignore_unreachable=True,
+            )
+            for index, (module_name, complex_args) in enumerate(calls)
+        ]
+        with self._call_context():
+            self._prepare_run()
+            cb, cb_extra = self._run_tasks(tasks, accumulator=BatchResultAccumulator)
+
+        results = []
+        for task in tasks:
+            try:
+                results.append(
+                    self._make_result(
+                        cb.task_results(task["name"]),
+                        cb_extra.task_results(task["name"])
+                        if cb_extra is not None
+                        else None,
+                    )
+                )
+            except AnsibleConnectionFailure as e:
+                results.append(e)
+        return results
+
+    def _stream(self, module_name, *module_args, **complex_args):
+        """Run the ansible module `module_name`, yielding `(host, ModuleResult)` pairs.
+
+        Each host result is yielded as soon as the host returns it.  Unreachable
+        hosts are yielded with `is_unreachable` set, and AnsibleConnectionFailure is
+        raised once every host returned, like for non streamed calls.
+        """
+        results = queue.Queue()
+        dispatcher = self.__class__(
+            **dict(
+                self.options,
+                module_name=module_name,
+                result_listener=lambda host, result: results.put((host, result)),
             )
         )
+        # The play runs on a plain thread feeding the queue, see start_thread
+        future = start_thread(dispatcher._run, *module_args, **complex_args)
+        future.add_done_callback(lambda _future: results.put(None))
+
+        while True:
+            item = results.get()
+            if item is None:
+                break
+            host, result = item
+            yield host, ModuleResult(result)
+
+        # Raise play errors and unreachable hosts
+        future.result()
@@ -1,30 +1,109 @@
 """PyTest Ansible Plugin."""
 
-import ansible
-import ansible.constants
-import ansible.errors
-import ansible.utils
-import pytest
+import argparse
+import json
+import os
+import sys
+
+from functools import partial
 
-from ansible.plugins.loader import become_loader
+import pytest
 
+from pytest_ansible.facts import FactsCache
 from pytest_ansible.fixtures import ansible_adhoc
 from pytest_ansible.fixtures import ansible_facts
+from pytest_ansible.fixtures import ansible_facts_session
+from pytest_ansible.fixtures import ansible_group
+from pytest_ansible.fixtures import ansible_host
 from pytest_ansible.fixtures import ansible_module
+from pytest_ansible.fixtures import ansible_module_session
 from pytest_ansible.fixtures import localhost
-from pytest_ansible.host_manager import get_host_manager
+from pytest_ansible.inventory import InventorySnapshot
 
 
 # Silence linters for imported fixtures
-(ansible_adhoc, ansible_module, ansible_facts, localhost)
+(
+    ansible_adhoc,
+    ansible_module,
+    ansible_facts,
+    ansible_module_session,
+    ansible_facts_session,
+    ansible_group,
+    ansible_host,
+    localhost,
+)
+
+# Nodes whose tests share the values of fixtures with a broader scope
+SCOPE_NODES = {
+    "class": pytest.Class,
+    "module": pytest.Module,
+    "package": pytest.Package,
+}
+
+
+# Options defaulting to an ansible setting, resolved once ansible is used.
+# Importing ansible.constants loads the ansible configuration, which is too
+# expensive to do in every pytest process just to build option defaults.
+ANSIBLE_DEFAULTS = {
+    "ansible_inventory": "DEFAULT_HOST_LIST",
+    "ansible_subset": "DEFAULT_SUBSET",
+    "ansible_connection": "DEFAULT_TRANSPORT",
+    "ansible_user": "DEFAULT_REMOTE_USER",
+    "ansible_module_path": "DEFAULT_MODULE_PATH",
+    "ansible_become": "DEFAULT_BECOME",
+    "ansible_become_method": "DEFAULT_BECOME_METHOD",
+    "ansible_become_user": "DEFAULT_BECOME_USER",
+    "ansible_ask_become_pass": "DEFAULT_BECOME_ASK_PASS",
+    "ansible_forks": "DEFAULT_FORKS",
+}
+
+
+def get_option(config, name):
+    """Return the value of the option `name`, falling back to its ansible setting."""
+    value = config.getoption(name)
+    if value is None and name in ANSIBLE_DEFAULTS:
+        import ansible.constants
+
+        value = getattr(ansible.constants, ANSIBLE_DEFAULTS[name])
+    return value
+
+
+def forks(value):
+    """Return a valid --ansible-forks value."""
+    if value == "auto":
+        return value
+    try:
+        value = int(value)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("expected a positive number or 'auto'")
+    return value
+
+
+def on_unreachable(value):
+    """Return a valid --ansible-on-unreachable value."""
+    if value in ("raise", "partial"):
+        return value
+    try:
+        threshold = float(value.rstrip("%"))
+    except ValueError:
+        threshold = -1
+    if not 0 <= threshold <= 100:
+        raise argparse.ArgumentTypeError(
+            "expected 'raise', 'partial' or a percentage of hosts"
+        )
+    return value
+
 
+def shard_hosts(hosts, index, count):
+    """Return the hosts of the `index`-th of `count` workers sharing `hosts`.
 
-def become_methods():
-    """Return string list of become methods available to ansible."""
-    if become_loader:
-        return [method.name for method in become_loader.all()]
-    else:
-        return ansible.constants.BECOME_METHODS
+    Sorted hosts are dealt round-robin, so every worker gets a stable share
+    differing by at most one host.  Workers get an empty share when there are
+    fewer hosts than workers, so no two workers contact the same host.
+    """
+    return sorted(hosts)[index::count]
 
 
 def pytest_addoption(parser):
@@ -36,9 +115,9 @@ def pytest_addoption(parser):
         "--ansible-inventory",
         action="store",
         dest="ansible_inventory",
-        default=ansible.constants.DEFAULT_HOST_LIST,
+        default=None,
         metavar="ANSIBLE_INVENTORY",
-        help="ansible inventory file URI (default: %(default)s)",
+        help="ansible inventory file URI (default: ansible DEFAULT_HOST_LIST setting)",
     )
     group.addoption(
         "--extra-inventory",
@@ -49,6 +128,152 @@ def pytest_addoption(parser):
         metavar="ANSIBLE_EXTRA_INVENTORY",
         help="ansible extra inventory file URI (default: %(default)s)",
     )
+    group.addoption(
+        "--parallel-inventories",
+        "--ansible-parallel-inventories",
+        action="store_true",
+        dest="ansible_parallel_inventories",
+        default=False,
+        help="run module calls against the inventory and the extra inventory concurrently (default: %(default)s)",
+    )
+    group.addoption(
+        "--no-inventory-cache",
+        "--ansible-no-inventory-cache",
+        action="store_false",
+        dest="ansible_inventory_cache",
+        default=True,
+        help="parse the inventory again for every host manager instead of reusing it until its files change",
+    )
+    group.addoption(
+        "--inventory-snapshot",
+        "--ansible-inventory-snapshot",
+        action="store_true",
+        dest="ansible_inventory_snapshot",
+        default=False,
+        help="keep a snapshot of the parsed inventory in the pytest cache and restore it in later sessions until the inventory files change (default: %(default)s)",
+    )
+    group.addoption(
+        "--ship-inventory",
+        "--ansible-ship-inventory",
+        action="store_true",
+        dest="ansible_ship_inventory",
+        default=False,
+        help="with pytest-xdist, resolve the inventory once on the controller and send it to the workers instead of parsing it on every worker (default: %(default)s)",
+    )
+    group.addoption(
+        "--forks",
+        "--ansible-forks",
+        action="store",
+        dest="ansible_forks",
+        type=forks,
+        default=None,
+        metavar="ANSIBLE_FORKS",
+        help="number of hosts a module runs on in parallel, or 'auto' to size it from the "
+        "number of hosts and CPUs (default: ansible DEFAULT_FORKS setting)",
+    )
+    group.addoption(
+        "--strategy",
+        "--ansible-strategy",
+        action="store",
+        dest="ansible_strategy",
+        default=None,
+        metavar="ANSIBLE_STRATEGY",
+        help="strategy plugin running module calls, e.g. linear, free or host_pinned (default: ansible DEFAULT_STRATEGY setting)",
+    )
+    group.addoption(
+        "--serial",
+        "--ansible-serial",
+        action="store",
+        dest="ansible_serial",
+        type=lambda value: value.split(","),
+        default=None,
+        metavar="ANSIBLE_SERIAL",
+        help="run module calls on rolling batches of hosts, as comma separated host counts or percentages (default: all hosts at once)",
+    )
+    group.addoption(
+        "--fail-fast",
+        "--ansible-fail-fast",
+        action="store_true",
+        dest="ansible_fail_fast",
+        default=False,
+        help="stop running a module call on more hosts once a host failed or was unreachable (default: %(default)s)",
+    )
+    group.addoption(
+        "--on-unreachable",
+        "--ansible-on-unreachable",
+        action="store",
+        dest="ansible_on_unreachable",
+        type=on_unreachable,
+        default="raise",
+        metavar="ANSIBLE_ON_UNREACHABLE",
+        help="'raise' on any unreachable host, return 'partial' results, or raise once more than a percentage of hosts is unreachable (default: %(default)s)",
+    )
+    group.addoption(
+        "--fixture-scope",
+        "--ansible-fixture-scope",
+        action="store",
+        dest="ansible_fixture_scope",
+        default="function",
+        choices=("function", "class", "module", "package", "session"),
+        help="share the ansible_module, ansible_facts and localhost fixtures between the tests of this scope (default: %(default)s)",
+    )
+    group.addoption(
+        "--facts-cache",
+        "--ansible-facts-cache",
+        action="store",
+        dest="ansible_facts_cache",
+        default="off",
+        choices=FactsCache.modes,
+        help="reuse the facts gathered by ansible_facts for the session (memory), "
+        "across sessions through the pytest cache (disk), or gather and persist them again (refresh) "
+        "(default: %(default)s)",
+    )
+    group.addoption(
+        "--facts-cache-ttl",
+        "--ansible-facts-cache-ttl",
+        action="store",
+        dest="ansible_facts_cache_ttl",
+        type=int,
+        default=3600,
+        metavar="SECONDS",
+        help="gather cached facts again once they are older than this, 0 to never expire them (default: %(default)s)",
+    )
+    group.addoption(
+        "--reuse-connections",
+        "--ansible-reuse-connections",
+        action="store_true",
+        dest="ansible_reuse_connections",
+        default=False,
+        help="keep ssh and persistent connections open between module calls until the session ends (default: %(default)s)",
+    )
+    group.addoption(
+        "--connection-idle-timeout",
+        "--ansible-connection-idle-timeout",
+        action="store",
+        dest="ansible_connection_idle_timeout",
+        type=int,
+        default=600,
+        metavar="SECONDS",
+        help="close reused persistent connections idle for this long (default: %(default)s)",
+    )
+    group.addoption(
+        "--max-concurrent-calls",
+        "--ansible-max-concurrent-calls",
+        action="store",
+        dest="ansible_max_concurrent_calls",
+        type=int,
+        default=8,
+        metavar="ANSIBLE_MAX_CONCURRENT_CALLS",
+        help="maximum number of module calls submitted with `submit()` or `async_` running at once (default: %(default)s)",
+    )
+    group.addoption(
+        "--shard-hosts",
+        "--ansible-shard-hosts",
+        action="store_true",
+        dest="ansible_shard_hosts",
+        default=False,
+        help="with pytest-xdist, split the hosts matching --ansible-host-pattern between workers, each running module calls on its share only (default: %(default)s)",
+    )
     group.addoption(
         "--host-pattern",
         "--ansible-host-pattern",
@@ -63,25 +288,25 @@ def pytest_addoption(parser):
         "--ansible-limit",
         action="store",
         dest="ansible_subset",
-        default=ansible.constants.DEFAULT_SUBSET,
+        default=None,
         metavar="ANSIBLE_SUBSET",
-        help="further limit selected hosts to an additional pattern",
+        help="further limit selected hosts to an additional pattern (default: ansible DEFAULT_SUBSET setting)",
     )
     group.addoption(
         "--connection",
         "--ansible-connection",
         action="store",
         dest="ansible_connection",
-        default=ansible.constants.DEFAULT_TRANSPORT,
-        help="connection type to use (default: %(default)s)",
+        default=None,
+        help="connection type to use (default: ansible DEFAULT_TRANSPORT setting)",
     )
     group.addoption(
         "--user",
         "--ansible-user",
         action="store",
         dest="ansible_user",
-        default=ansible.constants.DEFAULT_REMOTE_USER,
-        help="connect as this user (default: %(default)s)",
+        default=None,
+        help="connect as this user (default: ansible DEFAULT_REMOTE_USER setting)",
     )
     group.addoption(
         "--check",
@@ -96,8 +321,8 @@ def pytest_addoption(parser):
         "--ansible-module-path",
         action="store",
         dest="ansible_module_path",
-        default=ansible.constants.DEFAULT_MODULE_PATH,
-        help="specify path(s) to module library (default: %(default)s)",
+        default=None,
+        help="specify path(s) to module library (default: ansible DEFAULT_MODULE_PATH setting)",
     )
 
     # become privilege escalation
@@ -106,33 +331,33 @@ def pytest_addoption(parser):
         "--ansible-become",
         action="store_true",
         dest="ansible_become",
-        default=ansible.constants.DEFAULT_BECOME,
-        help="run operations with become, nopasswd implied (default: %(default)s)",
+        default=None,
+        help="run operations with become, nopasswd implied (default: ansible DEFAULT_BECOME setting)",
     )
     group.addoption(
         "--become-method",
         "--ansible-become-method",
         action="store",
         dest="ansible_become_method",
-        default=ansible.constants.DEFAULT_BECOME_METHOD,
-        help="privilege escalation method to use (default: %%(default)s), valid choices: [ %s ]"
-        % (" | ".join(become_methods())),
+        default=None,
+        help="privilege escalation method to use (default: ansible DEFAULT_BECOME_METHOD setting), "
+        "list valid choices with `ansible-doc -t become -l`",
     )
     group.addoption(
         "--become-user",
         "--ansible-become-user",
         action="store",
         dest="ansible_become_user",
-        default=ansible.constants.DEFAULT_BECOME_USER,
-        help="run operations as this user (default: %(default)s)",
+        default=None,
+        help="run operations as this user (default: ansible DEFAULT_BECOME_USER setting)",
     )
     group.addoption(
         "--ask-become-pass",
         "--ansible-ask-become-pass",
         action="store",
         dest="ansible_ask_become_pass",
-        default=ansible.constants.DEFAULT_BECOME_ASK_PASS,
-        help="ask for privilege escalation password (default: %(default)s)",
+        default=None,
+        help="ask for privilege escalation password (default: ansible DEFAULT_BECOME_ASK_PASS setting)",
     )
 
     # Add github marker to --help
@@ -144,60 +369,53 @@ def pytest_configure(config):
 
     config.addinivalue_line("markers", "ansible(**kwargs): Ansible integration")
 
-    # Enable connection debugging
-    if config.option.verbose > 0:
-        if hasattr(ansible.utils, "VERBOSITY"):
-            ansible.utils.VERBOSITY = int(config.option.verbose)
-        else:
-            from ansible.utils.display import Display
+    # NOTE: ansible itself is only configured once a test uses it, see
+    # PyTestAnsiblePlugin.configure_ansible
+    assert config.pluginmanager.register(PyTestAnsiblePlugin(config), "ansible")
 
-            display = Display()
-            display.verbosity = int(config.option.verbose)
 
-    assert config.pluginmanager.register(PyTestAnsiblePlugin(config), "ansible")
+def pytest_unconfigure(config):
+    """Release session-scoped ansible resources."""
+    plugin = config.pluginmanager.getplugin("ansible")
+    if plugin is not None:
+        plugin.facts_cache.save()
+
+    # Nothing to release when ansible was never used
+    executor = sys.modules.get("pytest_ansible.executor")
+    if executor is not None:
+        executor.shutdown()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Send the inventory resolved by the pytest-xdist controller to a starting worker."""
+    if node.config.getoption("ansible_ship_inventory"):
+        plugin = node.config.pluginmanager.getplugin("ansible")
+        shipped = plugin.shipped_inventory()
+        if shipped is not None:
+            node.workerinput["ansible_inventory"] = shipped
 
 
 def pytest_generate_tests(metafunc):
-    """Generate tests when specific `ansible_*` fixtures are used by tests."""
+    """Generate tests when specific `ansible_*` fixtures are used by tests.
+
+    Tests are parametrized with host and group names only; the `ansible_host`
+    and `ansible_group` fixtures build their module dispatcher at setup time.
+    """
 
     if "ansible_host" in metafunc.fixturenames:
         # assert required --ansible-* parameters were used
         PyTestAnsiblePlugin.assert_required_ansible_parameters(metafunc.config)
-        try:
-            plugin = metafunc.config.pluginmanager.getplugin("ansible")
-            hosts = plugin.initialize(
-                config=plugin.config,
-                pattern=metafunc.config.getoption("ansible_host_pattern"),
-            )
-        except ansible.errors.AnsibleError as e:
-            raise pytest.UsageError(e)
-        # Return the host name as a string
-        # metafunc.parametrize("ansible_host", hosts.keys())
-        # Return a HostManager instance where pattern=host (e.g. ansible_host.all.shell('date'))
-        # metafunc.parametrize("ansible_host", iter(plugin.initialize(config=plugin.config, pattern=h) for h in
-        #                                           hosts.keys()))
-        # Return a ModuleDispatcher instance representing `host` (e.g. ansible_host.shell('date'))
-        metafunc.parametrize("ansible_host", iter(hosts[h] for h in hosts.keys()))
+        plugin = metafunc.config.pluginmanager.getplugin("ansible")
+        snapshot = plugin.inventory_snapshot()
+        metafunc.parametrize("ansible_host", snapshot.hosts, indirect=True)
 
     if "ansible_group" in metafunc.fixturenames:
         # assert required --ansible-* parameters were used
         PyTestAnsiblePlugin.assert_required_ansible_parameters(metafunc.config)
-        try:
-            plugin = metafunc.config.pluginmanager.getplugin("ansible")
-            hosts = plugin.initialize(
-                config=plugin.config,
-                pattern=metafunc.config.getoption("ansible_host_pattern"),
-            )
-        except ansible.errors.AnsibleError as e:
-            raise pytest.UsageError(e)
-        # FIXME: Eeew, this shouldn't be interfacing with `hosts.options`
-        groups = hosts.options["inventory_manager"].list_groups()
-        extra_groups = hosts.get_extra_inventory_groups()
-        # Return the group name as a string
-        # metafunc.parametrize("ansible_group", groups)
-        # Return a ModuleDispatcher instance representing the group (e.g. ansible_group.shell('date'))
-        metafunc.parametrize("ansible_group", iter(hosts[g] for g in groups))
-        metafunc.parametrize("ansible_group", iter(hosts[g] for g in extra_groups))
+        plugin = metafunc.config.pluginmanager.getplugin("ansible")
+        snapshot = plugin.inventory_snapshot()
+        metafunc.parametrize("ansible_group", snapshot.group_names(), indirect=True)
 
 
 class PyTestAnsiblePlugin:
@@ -207,9 +425,23 @@ class PyTestAnsiblePlugin:
     def __init__(self, config):
         """Initialize plugin."""
         self.config = config
+        self._ansible_configured = False
+        self._scoped = dict()
+        # Host manager resolving the inventory once for the whole collection
+        self._collection_host_manager = None
+        self._inventory_snapshot = None
+        self._host_shard = None
+        self._shipped_inventory = None
+        self.facts_cache = FactsCache(
+            mode=config.getoption("ansible_facts_cache"),
+            ttl=config.getoption("ansible_facts_cache_ttl"),
+            cache=getattr(config, "cache", None),
+        )
 
     def pytest_report_header(self, config, startdir):
         """Return the version of ansible."""
+        import ansible
+
         return "ansible: %s" % ansible.__version__
 
     def pytest_collection_modifyitems(self, session, config, items):
@@ -235,6 +467,13 @@ class PyTestAnsiblePlugin:
         option_names = [
             "ansible_inventory",
             "ansible_extra_inventory",
+            "ansible_parallel_inventories",
+            "ansible_inventory_cache",
+            "ansible_fail_fast",
+            "ansible_on_unreachable",
+            "ansible_forks",
+            "ansible_strategy",
+            "ansible_serial",
             "ansible_host_pattern",
             "ansible_connection",
             "ansible_user",
@@ -251,7 +490,9 @@ class PyTestAnsiblePlugin:
         # Load command-line supplied values
         for key in option_names:
             short_key = key[8:]
-            kwargs[short_key] = config.getoption(key)
+            kwargs[short_key] = get_option(config, key)
+
+        import ansible.constants
 
         # normalize ansible.ansible_become options
         kwargs["become"] = kwargs.get("become") or ansible.constants.DEFAULT_BECOME
@@ -275,19 +516,210 @@ class PyTestAnsiblePlugin:
 
         return kwargs
 
+    def get_scoped(self, request, name, factory, scope=None):
+        """Return the value of the fixture `name`, calling `factory` once per `scope`.
+
+        `scope` defaults to `--ansible-fixture-scope`.  Tests overriding options
+        with `pytest.mark.ansible` share values only with tests using the same
+        marker options.  Like pytest does for class scoped fixtures, tests
+        outside of a class get their own value with the class scope.
+        """
+        if scope is None:
+            scope = self.config.getoption("ansible_fixture_scope")
+        if scope == "function":
+            return factory()
+
+        if scope == "session":
+            node = request.session
+        else:
+            node = request.node.getparent(SCOPE_NODES[scope])
+            if node is None:
+                if scope == "class":
+                    return factory()
+                node = request.session
+
+        marker_kwargs = self._load_request_config(request)
+        key = (name, node.nodeid, repr(sorted(marker_kwargs.items())))
+        if key not in self._scoped:
+            self._scoped[key] = factory()
+            if node is not request.session:
+                node.addfinalizer(partial(self._scoped.pop, key, None))
+        return self._scoped[key]
+
+    def configure_ansible(self):
+        """Apply the pytest options to ansible, the first time ansible is used."""
+        if self._ansible_configured:
+            return
+        self._ansible_configured = True
+
+        import ansible.utils
+
+        from pytest_ansible import executor
+
+        # Enable connection debugging
+        if self.config.option.verbose > 0:
+            if hasattr(ansible.utils, "VERBOSITY"):
+                ansible.utils.VERBOSITY = int(self.config.option.verbose)
+            else:
+                from ansible.utils.display import Display
+
+                display = Display()
+                display.verbosity = int(self.config.option.verbose)
+
+        # Bound the module calls running in the background
+        executor.dispatch_executor.max_workers = self.config.getoption(
+            "ansible_max_concurrent_calls"
+        )
+
+        if self.config.getoption("ansible_reuse_connections"):
+            executor.connection_cache.enable(
+                idle_timeout=self.config.getoption("ansible_connection_idle_timeout")
+            )
+
+        from pytest_ansible.has_version import has_ansible_v213
+
+        if not has_ansible_v213:
+            return
+        from pytest_ansible.host_manager.v213 import inventory_cache
+
+        # Restore inventories parsed by earlier sessions
+        if self.config.getoption("ansible_inventory_snapshot") and getattr(
+            self.config, "cache", None
+        ):
+            inventory_cache.persist(self.config.cache)
+
+        # Use the inventory shipped by the pytest-xdist controller, if any
+        shipped = getattr(self.config, "workerinput", {}).get("ansible_inventory")
+        if shipped is not None and self.config.getoption("ansible_inventory_cache"):
+            for sources, data in json.loads(shipped):
+                inventory_cache.restore(sources, data)
+
     def initialize(self, config=None, request=None, **kwargs):
         """Return an initialized Ansible Host Manager instance."""
+        from pytest_ansible.host_manager import get_host_manager
+
+        self.configure_ansible()
+
         ansible_cfg = dict()
         # merge command-line configuration options
         if config is not None:
-            ansible_cfg.update(self._load_ansible_config(config))
+            configured = self._load_ansible_config(config)
+            ansible_cfg.update(configured)
         # merge pytest request configuration options
         if request is not None:
             ansible_cfg.update(self._load_request_config(request))
         # merge in provided kwargs
         ansible_cfg.update(kwargs)
+
+        # Only restrict module calls on the configured hosts to this worker's share
+        if config is not None and all(
+            ansible_cfg.get(name) == configured.get(name)
+            for name in ("inventory", "extra_inventory", "host_pattern", "subset")
+        ):
+            shard = self.host_shard()
+            if shard is not None:
+                if not shard:
+                    pytest.skip(
+                        "No host is left for pytest-xdist worker {0}".format(
+                            os.environ.get("PYTEST_XDIST_WORKER")
+                        )
+                    )
+                ansible_cfg["subset"] = ",".join(shard)
         return get_host_manager(**ansible_cfg)
 
+    def collection_host_manager(self):
+        """Return the host manager resolving the inventory for the whole test run.
+
+        Collection parametrizes tests from it, and the `ansible_host` and
+        `ansible_group` fixtures build their module dispatchers from it.
+        """
+        if self._collection_host_manager is None:
+            import ansible.errors
+
+            try:
+                self._collection_host_manager = self.initialize(
+                    pattern=self.config.getoption("ansible_host_pattern"),
+                    **self._load_ansible_config(self.config),
+                )
+            except ansible.errors.AnsibleError as e:
+                raise pytest.UsageError(e)
+        return self._collection_host_manager
+
+    def inventory_snapshot(self):
+        """Return the InventorySnapshot of the hosts and groups tests are parametrized with.
+
+        The snapshot is taken once, the first time a test function needs it.
+        """
+        if self._inventory_snapshot is None:
+            self._inventory_snapshot = InventorySnapshot.from_host_manager(
+                self.collection_host_manager()
+            )
+        return self._inventory_snapshot
+
+    def shipped_inventory(self):
+        """Return the inventories resolved for the test run, serialized for pytest-xdist workers.
+
+        Return None when the inventories cannot be shipped, which requires
+        ansible-core 2.13 or later.
+        """
+        from pytest_ansible.has_version import has_ansible_v213
+
+        if not has_ansible_v213:
+            return None
+        if self._shipped_inventory is None:
+            from ansible.module_utils.common.json import AnsibleJSONEncoder
+
+            from pytest_ansible.host_manager.v213 import dump_inventory
+
+            hosts = self.collection_host_manager()
+            inventories = []
+            for prefix in ("", "extra_"):
+                if prefix + "inventory_manager" in hosts.options:
+                    inventories.append(
+                        [
+                            hosts.options[prefix + "inventory"],
+                            dump_inventory(
+                                hosts.options[prefix + "inventory_manager"],
+                                hosts.options[prefix + "loader"],
+                            ),
+                        ]
+                    )
+            self._shipped_inventory = json.dumps(inventories, cls=AnsibleJSONEncoder)
+        return self._shipped_inventory
+
+    def host_shard(self):
+        """Return the hosts of this xdist worker module calls are restricted to.
+
+        The list is empty when other workers have all the hosts.  Return None
+        unless `--ansible-shard-hosts` is used by one of several pytest-xdist
+        workers and hosts match the host pattern.
+        """
+        worker = os.environ.get("PYTEST_XDIST_WORKER")
+        count = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT") or 1)
+        if not self.config.getoption("ansible_shard_hosts") or not worker or count < 2:
+            return None
+
+        if self._host_shard is None:
+            hosts = self.collection_host_manager()
+            managers = [
+                hosts.options[name]
+                for name in ("inventory_manager", "extra_inventory_manager")
+                if name in hosts.options
+            ]
+            for manager in managers:
+                manager.subset(hosts.options.get("subset"))
+            try:
+                pattern = self.config.getoption("ansible_host_pattern")
+                matched = set(hosts.keys(host_pattern=pattern))
+            finally:
+                for manager in managers:
+                    manager.subset(None)
+            # xdist names its workers gw0, gw1, ...
+            index = int(worker.lstrip("gw"))
+            # Leave calls unrestricted when no host matches, so they report it
+            self._host_shard = shard_hosts(matched, index, count) if matched else False
+        return self._host_shard if self._host_shard is not False else None
+
     @staticmethod
     def assert_required_ansible_parameters(config):
         """Assert whether the required --ansible-* parameters were provided."""
@@ -303,7 +735,7 @@ class PyTestAnsiblePlugin:
         # NOTE: I don't think this will ever catch issues since ansible_inventory
         # defaults to '/etc/ansible/hosts'
         # Verify --ansible-inventory was provided
-        ansible_inventory = config.getoption("ansible_inventory")
+        ansible_inventory = get_option(config, "ansible_inventory")
         if ansible_inventory is None or ansible_inventory == "":
             errors.append(
                 "Unable to find an inventory file, specify one with the --ansible-inventory/--inventory "
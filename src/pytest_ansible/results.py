@@ -1,11 +1,92 @@
 """Fixme."""
 
-import ansible.errors  # NOQA
+from collections.abc import Mapping
 
 
-class ModuleResult(dict):
+# Module result statuses, from the most to the least severe
+STATUSES = ("unreachable", "failed", "skipped", "changed", "ok")
 
-    """Fixme."""
+
+def result_status(result):
+    """Return the most severe of the STATUSES matching the module `result` dictionary."""
+    if result.get("unreachable", False):
+        return "unreachable"
+    if result.get("failed", False) or result.get("rc", 0) != 0:
+        return "failed"
+    if result.get("skipped", False):
+        return "skipped"
+    if result.get("changed", False):
+        return "changed"
+    return "ok"
+
+
+class ModuleResult(Mapping):
+
+    """Read-only view of the dictionary returned by an ansible module for a host.
+
+    `ModuleResult(result)` wraps the `result` mapping without copying it, while
+    keyword arguments or several positional arguments build a new dict.
+    """
+
+    __slots__ = ("_result",)
+
+    def __init__(self, *args, **kwargs):
+        """Wrap the provided result."""
+        if len(args) == 1 and not kwargs and isinstance(args[0], Mapping):
+            result = args[0]
+            # Do not stack views
+            result = getattr(result, "_result", result)
+        else:
+            result = dict(*args, **kwargs)
+        object.__setattr__(self, "_result", result)
+
+    def __getitem__(self, key):
+        """Return the value of `key` in the result."""
+        return self._result[key]
+
+    def __iter__(self):
+        """Return an iterator of the result keys."""
+        return iter(self._result)
+
+    def __len__(self):
+        """Return the number of result keys."""
+        return len(self._result)
+
+    def __contains__(self, key):
+        """Return whether the result has `key`."""
+        return key in self._result
+
+    def __eq__(self, other):
+        """Return whether the result equals the `other` mapping."""
+        if isinstance(other, ModuleResult):
+            other = other._result
+        return self._result == other
+
+    def __ne__(self, other):
+        """Return whether the result differs from the `other` mapping."""
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self):
+        """Return the representation of the result dictionary."""
+        return repr(self._result)
+
+    def __setattr__(self, name, value):
+        """Refuse to modify the result."""
+        raise AttributeError("ModuleResult is read-only")
+
+    def __reduce__(self):
+        """Support copying and pickling despite being read-only."""
+        return (self.__class__, (self._result,))
+
+    def get(self, key, default=None):
+        """Return the value of `key` in the result, or `default`."""
+        return self._result.get(key, default)
+
+    def copy(self):
+        """Return a copy of the result as a dict."""
+        return dict(self._result)
 
     def _check_key(self, key):
         # if 'results' in self:
@@ -43,6 +124,10 @@ class ModuleResult(dict):
     def is_successful(self):
         return not (self.is_failed or self.is_unreachable)
 
+    @property
+    def status(self):
+        return result_status(self._result)
+
 
 class AdHocResult(object):
 
@@ -54,31 +139,48 @@ class AdHocResult(object):
         for kwarg in required_kwargs:
             assert kwarg in kwargs, "Missing required keyword argument '%s'" % kwarg
             setattr(self, kwarg, kwargs.get(kwarg))
+        # Results of unreachable hosts, when the call did not raise for them
+        self.unreachable = kwargs.get("unreachable") or dict()
+        # ModuleResult views, created on first access of each host
+        self._results = dict()
+
+    def _result(self, host):
+        """Return the ModuleResult of `host`, which must be contacted or unreachable."""
+        result = self._results.get(host)
+        if result is None:
+            if host in self.contacted:
+                result = ModuleResult(self.contacted[host])
+            else:
+                result = ModuleResult(self.unreachable[host])
+            self._results[host] = result
+        return result
 
     def __getitem__(self, item):
         """Return a ModuleResult instance matching the provided `item`."""
-        if item in self.contacted:
-            return ModuleResult(**self.contacted[item])
+        if item in self.contacted or item in self.unreachable:
+            return self._result(item)
         else:
             raise KeyError(item)
 
     def __getattr__(self, attr):
         """Return a ModuleResult instance matching the provided `attr`."""
-        if attr in self.contacted:
-            return ModuleResult(**self.contacted[attr])
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        if attr in self.contacted or attr in self.unreachable:
+            return self._result(attr)
         else:
             raise AttributeError("type AdHocResult has no attribute '%s'" % attr)
 
     def __len__(self):
-        """Return the number of contacted hosts."""
+        """Return the number of contacted hosts, leaving out unreachable hosts."""
         return len(self.contacted)
 
     def __contains__(self, item):
-        """Return whether the provided `item` was contacted."""
-        return item in self.contacted
+        """Return whether the provided `item` was contacted, or was unreachable."""
+        return item in self.contacted or item in self.unreachable
 
     def __iter__(self):
-        """Return an iterator of the contacted inventory hosts."""
+        """Return an iterator of the contacted inventory hosts, leaving out unreachable hosts."""
         return iter(self.contacted)
 
     def keys(self):
@@ -88,8 +190,120 @@ class AdHocResult(object):
     def items(self):
         """Return a list of tuples containing the inventory host key, and the ModuleResult instance."""
         for k in self.contacted.keys():
-            yield (k, getattr(self, k))
+            yield (k, self._result(k))
 
     def values(self):
         """Return a list of ModuleResult instances for each contacted inventory host."""
-        return [getattr(self, k) for k in self.contacted.keys()]
+        return [self._result(k) for k in self.contacted.keys()]
+
+    def failed_hosts(self):
+        """Return the list of contacted hosts whose module call failed."""
+        return [
+            host
+            for host, result in self.contacted.items()
+            if result.get("failed", False) or result.get("rc", 0) != 0
+        ]
+
+    def unreachable_hosts(self):
+        """Return the list of hosts which could not be contacted."""
+        return list(self.unreachable)
+
+    def changed_hosts(self):
+        """Return the list of contacted hosts where the module reported changes."""
+        return [
+            host
+            for host, result in self.contacted.items()
+            if result.get("changed", False)
+        ]
+
+    def hosts_by_status(self):
+        """Return a dictionary of the contacted hosts per status, see `STATUSES`."""
+        hosts = dict((status, []) for status in STATUSES)
+        for host, result in self.contacted.items():
+            hosts[result_status(result)].append(host)
+        hosts["unreachable"].extend(self.unreachable)
+        return hosts
+
+    def count_by_status(self):
+        """Return a dictionary of the number of contacted hosts per status, see `STATUSES`."""
+        counts = dict.fromkeys(STATUSES, 0)
+        for result in self.contacted.values():
+            counts[result_status(result)] += 1
+        counts["unreachable"] += len(self.unreachable)
+        return counts
+
+    def where(self, predicate):
+        """Return an AdHocResult of the hosts whose ModuleResult matches `predicate`."""
+        return AdHocResult(
+            contacted=dict(
+                (host, result)
+                for host, result in self.contacted.items()
+                if predicate(self._result(host))
+            ),
+            unreachable=dict(
+                (host, result)
+                for host, result in self.unreachable.items()
+                if predicate(self._result(host))
+            ),
+        )
+
+    def pluck(self, key, default=None):
+        """Return a dictionary of the value of `key` in the result of each contacted host."""
+        return dict(
+            (host, result.get(key, default)) for host, result in self.contacted.items()
+        )
+
+    def to_records(self, *keys):
+        """Return a list of dictionaries, one per contacted or unreachable host.
+
+        Each record holds the `host`, its `status` and the result `keys`, or the
+        whole result without `keys`.  The `host` and `status` fields take
+        precedence over result keys of the same name.
+        `pandas.DataFrame(result.to_records())` builds a table of the results.
+        """
+        records = []
+        for host, result in list(self.contacted.items()) + list(
+            self.unreachable.items()
+        ):
+            if keys:
+                record = dict((key, result.get(key)) for key in keys)
+            else:
+                record = dict(result)
+            record.update(host=host, status=result_status(result))
+            records.append(record)
+        return records
+
+
+class DeferredAdHocResult(AdHocResult):
+
+    """An AdHocResult which becomes available once its batch of module calls has run."""
+
+    def __init__(self):
+        """Initialize an unresolved result."""
+        self._resolved = False
+        self._error = None
+
+    def __getattr__(self, attr):
+        """Return a ModuleResult instance matching the provided `attr` once resolved."""
+        if attr.startswith("__") or attr in (
+            "_resolved",
+            "_error",
+            "_results",
+            "unreachable",
+        ):
+            raise AttributeError(attr)
+        if self._error is not None:
+            raise self._error
+        if not self._resolved:
+            raise RuntimeError(
+                "Results of a batched module call are only available after the batch has run"
+            )
+        return super(DeferredAdHocResult, self).__getattr__(attr)
+
+    def _resolve(self, result=None, error=None):
+        """Resolve with the attributes of the AdHocResult `result`, or with `error`."""
+        if error is not None:
+            self._error = error
+        else:
+            self.__dict__.update(vars(result))
+            self._resolved = True
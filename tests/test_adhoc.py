@@ -145,7 +145,7 @@ def test_become(testdir, option):
         import ansible
         import re
         import os
-        from pkg_resources import parse_version
+        from pytest_ansible.has_version import parse_version
 
         @pytest.mark.ansible(inventory='%s', host_pattern='localhost')
         def test_func(ansible_module):
@@ -156,3 +156,117 @@ def test_connection_failure_extra_inventory_v2():
         "Failed to connect to the host via ssh"
         in exc_info.value.dark["unknown.example.extra.com"]["msg"]
     )
+
+
+def test_results_are_cached_views(adhoc_result):
+    """Verify host results wrap the contacted dictionaries without copying them."""
+    for host in ALL_HOSTS:
+        result = adhoc_result[host]
+        assert result is getattr(adhoc_result, host)
+        assert result._result is adhoc_result.contacted[host]
+        assert result == adhoc_result.contacted[host]
+    assert adhoc_result.values() == [adhoc_result[host] for host in adhoc_result]
+
+    with pytest.raises(TypeError):
+        adhoc_result[ALL_HOSTS[0]]["ping"] = "pang"
+
+
+@pytest.fixture()
+def fleet_result():
+    from pytest_ansible.results import AdHocResult
+
+    return AdHocResult(
+        contacted={
+            "ok": dict(rc=0, stdout="a"),
+            "changed": dict(changed=True, rc=0, stdout="b"),
+            "failed": dict(failed=True, msg="boom"),
+            "rc": dict(changed=True, rc=1, stdout="c"),
+            "skipped": dict(skipped=True),
+        }
+    )
+
+
+def test_fleet_queries(fleet_result):
+    assert fleet_result.failed_hosts() == ["failed", "rc"]
+    assert fleet_result.changed_hosts() == ["changed", "rc"]
+    assert fleet_result.count_by_status() == dict(
+        unreachable=0, failed=2, skipped=1, changed=1, ok=1
+    )
+    assert fleet_result.hosts_by_status()["failed"] == ["failed", "rc"]
+    assert fleet_result.pluck("stdout") == dict(
+        ok="a", changed="b", failed=None, rc="c", skipped=None
+    )
+    assert fleet_result.ok.status == "ok"
+
+
+def test_fleet_where(fleet_result):
+    successful = fleet_result.where(lambda result: result.is_successful)
+    assert sorted(successful) == ["changed", "ok", "skipped"]
+    assert successful.changed["stdout"] == "b"
+
+
+def test_fleet_records(fleet_result):
+    records = fleet_result.to_records("rc")
+    assert records[0] == dict(host="ok", status="ok", rc=0)
+    assert records[2] == dict(host="failed", status="failed", rc=None)
+    assert fleet_result.to_records()[1] == dict(
+        host="changed", status="changed", changed=True, rc=0, stdout="b"
+    )
+
+
+def test_records_keep_host_and_status():
+    from pytest_ansible.results import AdHocResult
+
+    result = AdHocResult(
+        contacted={"web": dict(host="db", status="running", changed=True)}
+    )
+    assert result.to_records()[0] == dict(host="web", status="changed", changed=True)
+    assert result.to_records("status")[0] == dict(host="web", status="changed")
+
+
+def test_partial_result_keeps_unreachable_hosts():
+    from pytest_ansible.results import AdHocResult
+
+    result = AdHocResult(
+        contacted={"up": dict(ping="pong")},
+        unreachable={"down": dict(unreachable=True, msg="timed out")},
+    )
+    assert list(result) == ["up"] and len(result) == 1
+    assert result.unreachable_hosts() == ["down"]
+    assert "down" in result
+    assert result["down"].is_unreachable
+    assert result.down.status == "unreachable"
+    assert result.count_by_status()["unreachable"] == 1
+    assert result.where(lambda host: not host.is_successful).unreachable_hosts() == [
+        "down"
+    ]
+    assert result.to_records("msg")[1] == dict(
+        host="down", status="unreachable", msg="timed out"
+    )
+
+
+@pytest.mark.requires_ansible_v2
+@pytest.mark.parametrize("on_unreachable", ["partial", "50%"])
+def test_connection_failure_partial_v2(tmp_path, on_unreachable):
+    from pytest_ansible.host_manager import get_host_manager
+
+    inventory = tmp_path / "hosts.ini"
+    inventory.write_text("localhost ansible_connection=local\nunknown.example.com\n")
+    hosts = get_host_manager(
+        inventory=str(inventory), connection="smart", on_unreachable=on_unreachable
+    )
+    result = hosts.all.ping()
+    assert result.unreachable_hosts() == ["unknown.example.com"]
+    assert result["unknown.example.com"].is_unreachable
+
+
+@pytest.mark.requires_ansible_v2
+def test_connection_failure_threshold_v2():
+    from pytest_ansible.errors import AnsibleConnectionFailure
+    from pytest_ansible.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="unknown.example.com,", connection="smart", on_unreachable="50%"
+    )
+    with pytest.raises(AnsibleConnectionFailure):
+        hosts.all.ping()
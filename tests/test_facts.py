@@ -0,0 +1,70 @@
+import pytest
+
+from pytest_ansible.facts import FactsCache
+
+
+class DictCache(dict):
+    """Stand-in for the `get`/`set` interface of pytest's config.cache."""
+
+    def set(self, key, value):
+        self[key] = value
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        FactsCache(mode="sometimes")
+
+
+def cache_key(dispatcher, gather_subset=None):
+    return FactsCache._make_key("localhost", gather_subset, dispatcher.options)
+
+
+def test_memory_cache(hosts):
+    """Verify cached facts are returned without gathering them again."""
+    facts_cache = FactsCache(mode="memory")
+    first = facts_cache.gather(hosts.localhost)
+    assert "ansible_facts" in first.localhost
+
+    facts_cache.entries[cache_key(hosts.localhost)]["result"] = dict(ansible_facts={})
+    second = facts_cache.gather(hosts.localhost)
+    assert second.localhost["ansible_facts"] == {}
+
+
+def test_expired_facts(hosts):
+    """Verify facts are gathered again once they expired."""
+    facts_cache = FactsCache(mode="memory", ttl=60)
+    facts_cache.gather(hosts.localhost)
+    key = cache_key(hosts.localhost)
+    facts_cache.entries[key]["time"] -= 120
+    facts_cache.entries[key]["result"] = dict(ansible_facts={})
+
+    assert facts_cache.gather(hosts.localhost).localhost["ansible_facts"]
+
+
+def test_disk_cache(hosts):
+    """Verify facts are persisted, and replaced when refreshing."""
+    cache = DictCache()
+    facts_cache = FactsCache(mode="disk", cache=cache)
+    facts_cache.gather(hosts.localhost)
+    facts_cache.save()
+    key = cache_key(hosts.localhost)
+    assert key in cache[FactsCache.cache_key]
+
+    cache[FactsCache.cache_key][key]["result"] = dict(ansible_facts={})
+    disk = FactsCache(mode="disk", cache=cache).gather(hosts.localhost)
+    assert not disk.localhost["ansible_facts"]
+    refresh = FactsCache(mode="refresh", cache=cache).gather(hosts.localhost)
+    assert refresh.localhost["ansible_facts"]
+
+
+def test_cache_key_context(hosts):
+    """Verify facts of a host are not shared between connections or users."""
+    facts_cache = FactsCache(mode="memory")
+    facts_cache.gather(hosts.localhost)
+    key = cache_key(hosts.localhost)
+    facts_cache.entries[key]["result"] = dict(ansible_facts={})
+
+    become = hosts.localhost.with_options(become_user="nobody")
+    assert cache_key(become) != key
+    assert cache_key(hosts.localhost.with_options(connection="ssh")) != key
+    assert facts_cache.gather(hosts.localhost).localhost["ansible_facts"] == {}
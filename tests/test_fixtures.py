@@ -85,3 +85,93 @@ def test_localhost(testdir, option):
     result = testdir.runpytest(*option.args)
     assert result.ret == EXIT_OK
     assert result.parseoutcomes()["passed"] == 1
+
+
+def test_ansible_module_session(testdir, option):
+    src = """
+        import pytest
+        seen = []
+        def test_first(ansible_module_session, ansible_module):
+            seen.append(ansible_module_session)
+            assert ansible_module is not ansible_module_session
+        def test_second(ansible_module_session):
+            assert ansible_module_session is seen[0]
+        @pytest.mark.ansible(host_pattern='localhost')
+        def test_marker(ansible_module_session):
+            assert ansible_module_session is not seen[0]
+    """
+    testdir.makepyfile(src)
+    result = testdir.runpytest(
+        *option.args
+        + [
+            "--ansible-inventory",
+            str(option.inventory),
+            "--ansible-host-pattern",
+            "local",
+        ]
+    )
+    assert result.ret == EXIT_OK
+    assert result.parseoutcomes()["passed"] == 3
+
+
+def test_fixture_scope(testdir, option):
+    src = """
+        import pytest
+        seen = []
+        def test_first(ansible_module):
+            seen.append(ansible_module)
+        def test_second(ansible_module):
+            assert ansible_module is seen[0]
+    """
+    testdir.makepyfile(src)
+    result = testdir.runpytest(
+        *option.args
+        + [
+            "--ansible-inventory",
+            str(option.inventory),
+            "--ansible-host-pattern",
+            "local",
+            "--ansible-fixture-scope",
+            "module",
+        ]
+    )
+    assert result.ret == EXIT_OK
+    assert result.parseoutcomes()["passed"] == 2
+
+
+def test_fixture_scope_class_outside_class(testdir, option):
+    """Verify tests outside of a class do not share class scoped fixtures."""
+    testdir.makepyfile(
+        test_a="""
+        import pytest
+        seen = []
+        def test_a(localhost):
+            seen.append(localhost)
+        """,
+        test_b="""
+        import pytest
+        from test_a import seen
+        def test_b(localhost):
+            assert seen and localhost is not seen[0]
+        class TestB(object):
+            def test_first(self, localhost):
+                seen.append(localhost)
+            def test_second(self, localhost):
+                assert localhost is seen[-1]
+        """,
+    )
+    result = testdir.runpytest(
+        *option.args
+        + [
+            "--ansible-inventory",
+            str(option.inventory),
+            "--ansible-host-pattern",
+            "local",
+            "--ansible-fixture-scope",
+            "class",
+            "test_a.py",
+            "test_b.py",
+        ]
+    )
+    assert result.ret == EXIT_OK
+    assert result.parseoutcomes()["passed"] == 4
@@ -0,0 +1,82 @@
+import subprocess
+import sys
+
+import pytest
+
+from pytest_ansible.has_version import parse_version
+
+
+@pytest.mark.parametrize(
+    "older, newer",
+    [
+        ("2.8.0.dev0", "2.8.0"),
+        ("2.8.0", "2.8.1"),
+        ("2.9.27", "2.10.0"),
+        ("2.13.0rc1", "2.13.0"),
+        ("2.14.0b1", "2.14.0rc1"),
+        ("2.14.0a2", "2.14.0b1"),
+        ("2.14.0.dev0", "2.14.0a1"),
+    ],
+)
+def test_parse_version_order(older, newer):
+    assert parse_version(older) < parse_version(newer)
+
+
+@pytest.mark.parametrize(
+    "version, same",
+    [
+        ("2.13", "2.13.0"),
+        ("2.15.0.post1", "2.15.0"),
+        ("2.15.0+local", "2.15.0"),
+        ("2.8.0dev0", "2.8.0.dev0"),
+    ],
+)
+def test_parse_version_equal(version, same):
+    assert parse_version(version) == parse_version(same)
+
+
+def test_parse_version_invalid():
+    with pytest.raises(ValueError):
+        parse_version("devel")
+
+
+def test_version_gates():
+    from ansible.release import __version__
+
+    from pytest_ansible import has_version
+
+    assert has_version.has_ansible_v2
+    assert has_version.has_ansible_v1 is not has_version.has_ansible_v2
+    assert has_version.has_ansible_v213 == (
+        parse_version(__version__) >= parse_version("2.13.0")
+    )
+
+
+def _import_time(module):
+    """Return the cumulative microseconds `python -X importtime` reports for `module`."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % module],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+    imported = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            imported[name.strip()] = int(cumulative)
+    return imported
+
+
+def test_import_time():
+    """Benchmark importing the version gates against importing pkg_resources."""
+    imported = _import_time("pytest_ansible.has_version")
+    assert "pkg_resources" not in imported
+    assert "ansible" not in imported
+
+    pkg_resources = _import_time("pkg_resources").get("pkg_resources")
+    if pkg_resources is None:
+        pytest.skip("pkg_resources is not available")
+    assert imported["pytest_ansible.has_version"] < pkg_resources
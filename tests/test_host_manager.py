@@ -83,3 +83,186 @@ def test_defaults(request):
     # hosts = get_host_manager(inventory='unknown.example.com,')
     assert "connection" in hosts.options
     assert hosts.options["connection"] == DEFAULT_TRANSPORT
+
+
+def test_inventory_cache(tmp_path, monkeypatch):
+    """Verify host managers reuse a parsed inventory until its file changes."""
+    import os
+
+    from pytest_ansible.host_manager import get_host_manager
+    from pytest_ansible.host_manager import v213
+
+    inventory = tmp_path / "hosts.ini"
+    inventory.write_text("localhost\n")
+
+    first = get_host_manager(inventory=str(inventory), connection="local")
+    monkeypatch.setattr(v213, "load_inventory", None)
+    second = get_host_manager(inventory=str(inventory), connection="local")
+    assert second.keys() == ["localhost"]
+    assert (
+        first.options["inventory_manager"]._inventory
+        is not second.options["inventory_manager"]._inventory
+    )
+    assert first.options["inventory_manager"] is not second.options["inventory_manager"]
+    assert first.options["variable_manager"] is not second.options["variable_manager"]
+
+    monkeypatch.undo()
+    inventory.write_text("localhost\nanother_host\n")
+    stat = os.stat(str(inventory))
+    os.utime(str(inventory), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    third = get_host_manager(inventory=str(inventory), connection="local")
+    assert sorted(third.keys()) == ["another_host", "localhost"]
+
+    uncached = get_host_manager(
+        inventory=str(inventory), connection="local", inventory_cache=False
+    )
+    assert (
+        uncached.options["inventory_manager"]._inventory
+        is not third.options["inventory_manager"]._inventory
+    )
+
+
+def test_inventory_cache_isolation():
+    """Verify host managers sharing an inventory keep their own subset and facts."""
+    from pytest_ansible.host_manager import get_host_manager
+
+    first = get_host_manager(inventory="localhost,another_host,", connection="local")
+    second = get_host_manager(
+        inventory="localhost,another_host,", connection="local", subset="localhost"
+    )
+    second.localhost.set_fact(pytest_ansible_fact="leaked")
+    assert len(first) == 2
+    assert sorted(first.keys()) == ["another_host", "localhost"]
+
+    host = first.options["inventory_manager"].get_host("localhost")
+    assert "pytest_ansible_fact" not in first.options["variable_manager"].get_vars(
+        host=host
+    )
+
+
+def test_inventory_cache_plays_isolated():
+    """Verify inventory changes made by the plays of a host manager stay its own."""
+    from pytest_ansible.host_manager import get_host_manager
+
+    first = get_host_manager(inventory="localhost,", connection="local")
+    first.localhost.add_host(name="injected", groups="web")
+    first.localhost.group_by(key="dyn")
+    assert sorted(first.options["inventory_manager"].groups) == [
+        "all",
+        "dyn",
+        "ungrouped",
+        "web",
+    ]
+
+    second = get_host_manager(inventory="localhost,", connection="local")
+    assert second.keys() == ["localhost"]
+    assert sorted(second.options["inventory_manager"].groups) == ["all", "ungrouped"]
+    host = second.options["inventory_manager"].get_host("localhost")
+    assert [group.name for group in host.get_groups()] == ["all", "ungrouped"]
+
+
+def test_host_index(hosts):
+    """Verify host pattern lookups are memoized until the inventory subset changes."""
+    assert "local*" in hosts
+    cached = hosts._list_hosts(host_pattern="local*")
+    assert cached == ["localhost"]
+    assert hosts._list_hosts(host_pattern="local*") is cached
+
+    hosts.options["inventory_manager"].subset("another_host")
+    try:
+        assert hosts._list_hosts(host_pattern="local*") == []
+        assert hosts.keys() == ["another_host"]
+    finally:
+        hosts.options["inventory_manager"].subset(None)
+    assert len(hosts) == len(ALL_HOSTS)
+
+
+def test_restore_inventory(tmp_path):
+    """Verify a dumped inventory is rebuilt with its groups, hosts and variables."""
+    import json
+
+    from pytest_ansible.host_manager.v213 import dump_inventory
+    from pytest_ansible.host_manager.v213 import load_inventory
+    from pytest_ansible.host_manager.v213 import restore_inventory
+
+    inventory = tmp_path / "hosts.ini"
+    inventory.write_text(
+        "[web]\nweb1 ansible_port=2222\n\n[web:vars]\nx=inventory_file_group\n\n"
+        "[prod:children]\nweb\n\n[prod:vars]\nenv=prod\n"
+    )
+    (tmp_path / "group_vars").mkdir()
+    (tmp_path / "group_vars" / "web.yml").write_text("role: frontend\n")
+    (tmp_path / "group_vars" / "all.yml").write_text("x: group_vars_all\n")
+    (tmp_path / "host_vars").mkdir()
+    (tmp_path / "host_vars" / "web1.yml").write_text("hv: web1\n")
+
+    loader, inventory_manager, variable_manager = load_inventory(str(inventory))
+    host_vars = variable_manager.get_vars(host=inventory_manager.get_host("web1"))
+    # group_vars/all ranks above the group variables of the inventory file
+    assert host_vars["x"] == "group_vars_all"
+    data = json.loads(json.dumps(dump_inventory(inventory_manager, loader)))
+    loader, inventory_manager, variable_manager = restore_inventory(data)
+
+    assert [host.name for host in inventory_manager.list_hosts("prod")] == ["web1"]
+    host_vars = variable_manager.get_vars(host=inventory_manager.get_host("web1"))
+    assert host_vars["ansible_port"] == 2222
+    assert host_vars["env"] == "prod"
+    assert host_vars["role"] == "frontend"
+    assert host_vars["hv"] == "web1"
+    assert host_vars["x"] == "group_vars_all"
+
+
+def test_inventory_snapshot_cache(tmp_path, monkeypatch):
+    """Verify a persisted inventory snapshot is restored until the inventory changes."""
+    from pytest_ansible.host_manager import v213
+
+    class Store(dict):
+        def set(self, key, value):
+            self[key] = value
+
+    inventory = tmp_path / "hosts.ini"
+    inventory.write_text("[web]\nweb1\n\n[web:vars]\nx=inventory_file_group\n")
+    (tmp_path / "group_vars").mkdir()
+    group_vars = tmp_path / "group_vars" / "web.yml"
+    group_vars.write_text("role: frontend\n")
+    (tmp_path / "group_vars" / "all.yml").write_text("x: group_vars_all\n")
+    store = Store()
+
+    cache = v213.InventoryCache()
+    cache.persist(store)
+    cache.get(str(inventory))
+    assert len(store) == 1
+
+    # A later session restores the snapshot instead of parsing the inventory
+    monkeypatch.setattr(v213, "load_inventory", None)
+    cache = v213.InventoryCache()
+    cache.persist(store)
+    loader, inventory_manager, variable_manager = cache.get(str(inventory))
+    assert [host.name for host in inventory_manager.list_hosts("web")] == ["web1"]
+    host_vars = variable_manager.get_vars(host=inventory_manager.get_host("web1"))
+    assert host_vars["role"] == "frontend"
+    # group_vars/all still ranks above the group variables of the inventory file
+    assert host_vars["x"] == "group_vars_all"
+
+    # Snapshots of another format are not restored
+    for snapshot in store.values():
+        snapshot["version"] = None
+    cache = v213.InventoryCache()
+    cache.persist(store)
+    with pytest.raises(TypeError):
+        cache.get(str(inventory))
+
+    # Modified group_vars are not restored from the snapshot
+    group_vars.write_text("role: backend\n")
+    monkeypatch.undo()
+    cache = v213.InventoryCache()
+    cache.persist(store)
+    loader, inventory_manager, variable_manager = cache.get(str(inventory))
+    host_vars = variable_manager.get_vars(host=inventory_manager.get_host("web1"))
+    assert host_vars["role"] == "backend"
+
+    inventory.write_text("[web]\nweb1\nweb2\n")
+    cache = v213.InventoryCache()
+    cache.persist(store)
+    loader, inventory_manager, variable_manager = cache.get(str(inventory))
+    assert len(inventory_manager.list_hosts("web")) == 2
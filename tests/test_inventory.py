@@ -0,0 +1,44 @@
+import pickle
+
+import pytest
+
+from pytest_ansible.inventory import InventorySnapshot
+
+
+@pytest.fixture()
+def snapshot():
+    return InventorySnapshot(
+        hosts=["one", "two", "extra"],
+        groups={"all": ["one", "two"], "web": ["two"]},
+        extra_groups={"all": ["extra"]},
+    )
+
+
+def test_snapshot_names(snapshot):
+    assert snapshot.hosts == ("one", "two", "extra")
+    assert snapshot.groups["web"] == ("two",)
+    assert snapshot.group_names() == ["all", "web", "all"]
+
+
+def test_snapshot_is_read_only(snapshot):
+    with pytest.raises(AttributeError):
+        snapshot.hosts = ()
+    with pytest.raises(TypeError):
+        snapshot.groups["db"] = ()
+
+
+def test_snapshot_serialization(snapshot):
+    data = snapshot.to_dict()
+    assert data["extra_groups"] == {"all": ["extra"]}
+    assert InventorySnapshot.from_dict(data) == snapshot
+    assert pickle.loads(pickle.dumps(snapshot)) == snapshot
+
+
+def test_snapshot_from_host_manager():
+    from pytest_ansible.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="one,two,", connection="local")
+    snapshot = InventorySnapshot.from_host_manager(hosts)
+    assert sorted(snapshot.hosts) == ["one", "two"]
+    assert sorted(snapshot.groups["all"]) == ["one", "two"]
+    assert snapshot.extra_groups == {}
@@ -55,3 +55,309 @@ def test_ansible_module_error(hosts):
     ) == "The module {0} was not found in configured module paths.".format(
         "a_module_that_most_certainly_does_not_exist"
     )
+
+
+def test_task_queue_manager_reused(hosts):
+    """Verify consecutive module calls share one pooled TaskQueueManager."""
+    from pytest_ansible.executor import task_queue_manager_pool
+
+    task_queue_manager_pool.shutdown()
+    hosts.all.ping()
+    hosts.localhost.ping()
+    assert len(task_queue_manager_pool) == 1
+
+    task_queue_manager_pool.shutdown()
+    assert len(task_queue_manager_pool) == 0
+
+
+def test_task_queue_manager_shared_between_host_managers():
+    """Verify host managers of the same inventory share one pooled TaskQueueManager."""
+    from pytest_ansible.executor import task_queue_manager_pool
+    from pytest_ansible.host_manager import get_host_manager
+
+    task_queue_manager_pool.shutdown()
+    for _ in range(3):
+        hosts = get_host_manager(inventory="localhost,", connection="local")
+        assert hosts.localhost.ping().localhost.is_successful
+        ((key, tqm),) = task_queue_manager_pool._idle
+        assert tqm._inventory is hosts.options["inventory_manager"]
+        assert tqm._variable_manager is hosts.options["variable_manager"]
+
+    task_queue_manager_pool.shutdown()
+
+
+def test_task_queue_manager_pool_fallback(hosts, monkeypatch):
+    """Verify a pooled manager is replaced when its play state can not be reset."""
+    from pytest_ansible.executor import TaskQueueManagerPool
+    from pytest_ansible.executor import task_queue_manager_pool
+
+    task_queue_manager_pool.shutdown()
+    hosts.all.ping()
+    ((key, tqm),) = task_queue_manager_pool._idle
+
+    monkeypatch.setattr(TaskQueueManagerPool, "_play_state", ("_no_such_attribute",))
+    hosts.all.ping()
+    ((key, replacement),) = task_queue_manager_pool._idle
+    assert replacement is not tqm
+
+
+def test_cli_context_parsed_once():
+    """Verify the global CLI context is only parsed again when options change."""
+    from ansible import context
+
+    from pytest_ansible.module_dispatcher.v213 import cli_context
+
+    options = dict(host_pattern="all", connection="local", user="alice")
+    cli_context.load(options)
+    cliargs = context.CLIARGS
+    assert cliargs["remote_user"] == "alice"
+
+    cli_context.load(dict(options, host_pattern="localhost"))
+    assert context.CLIARGS is cliargs
+
+    cli_context.load(dict(options, user="bob"))
+    assert context.CLIARGS is not cliargs
+    assert context.CLIARGS["remote_user"] == "bob"
+
+
+def test_parallel_inventories():
+    """Verify plays against the inventory and extra inventory can run concurrently."""
+    from pytest_ansible.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,",
+        extra_inventory="another_host,",
+        connection="local",
+        parallel_inventories=True,
+    )
+    contacted = hosts.all.ping()
+    assert set(contacted) == {"localhost", "another_host"}
+    for result in contacted.values():
+        assert result["ping"] == "pong"
+
+
+def test_batch(hosts):
+    """Verify batched module calls resolve once the batch has run."""
+    with hosts.all.batch() as batch:
+        ping = batch.ping()
+        command = batch.command("echo batched")
+        failed = batch.command("false")
+        assert len(batch) == 3
+        with pytest.raises(RuntimeError):
+            len(ping)
+
+    assert set(ping) == set(hosts.keys())
+    for result in ping.values():
+        assert result["ping"] == "pong"
+    for result in command.values():
+        assert result["stdout"] == "batched"
+    for result in failed.values():
+        assert result.is_failed
+
+
+def test_batch_module_error(hosts):
+    """Verify batches raise AnsibleModuleError for unknown modules."""
+    from pytest_ansible.errors import AnsibleModuleError
+
+    with pytest.raises(AnsibleModuleError):
+        with hosts.all.batch() as batch:
+            batch.a_module_that_most_certainly_does_not_exist()
+
+
+def test_submit(hosts):
+    """Verify module calls submitted in the background resolve to AdHocResults."""
+    futures = [hosts.localhost.submit("ping"), hosts.all.submit("command", "true")]
+    ping, command = [future.result() for future in futures]
+
+    assert set(ping) == {"localhost"}
+    assert ping.localhost["ping"] == "pong"
+    assert set(command) == set(hosts.keys())
+
+
+def test_dispatch_executor_bounded():
+    """Verify the dispatch executor runs calls on at most max_workers threads."""
+    import threading
+
+    from pytest_ansible.executor import DispatchExecutor
+
+    executor = DispatchExecutor(max_workers=2)
+    release = threading.Event()
+    futures = [executor.submit(release.wait) for _ in range(20)]
+    threads = list(executor._threads)
+    assert len(threads) == 2
+    release.set()
+    assert all(future.result() for future in futures)
+
+    executor.shutdown()
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_async_dispatcher(hosts):
+    """Verify module calls can be awaited."""
+    import asyncio
+
+    async def fan_out():
+        return await asyncio.gather(
+            hosts.localhost.async_.ping(),
+            hosts.all.async_.ping(),
+        )
+
+    localhost, everyone = asyncio.run(fan_out())
+    assert set(localhost) == {"localhost"}
+    assert set(everyone) == set(hosts.keys())
+
+
+def test_call_gate():
+    """Verify calls with another key wait for the running calls to finish."""
+    import threading
+
+    from pytest_ansible.module_dispatcher.v213 import CallGate
+
+    gate = CallGate()
+    events = []
+
+    def call(key):
+        with gate.enter(key):
+            events.append(key)
+
+    with gate.enter("alice"):
+        call("alice")
+        bob = threading.Thread(target=call, args=("bob",))
+        bob.start()
+        bob.join(0.2)
+        assert bob.is_alive()
+    bob.join()
+    assert events == ["alice", "bob"]
+
+
+def test_submit_module_error(hosts):
+    """Verify submit raises AnsibleModuleError for unknown modules."""
+    from pytest_ansible.errors import AnsibleModuleError
+
+    with pytest.raises(AnsibleModuleError):
+        hosts.all.submit("a_module_that_most_certainly_does_not_exist")
+
+
+def test_module_resolver(hosts):
+    """Verify module lookups, including unknown modules, are remembered."""
+    from pytest_ansible.module_dispatcher.v213 import module_resolver
+
+    module_resolver.clear()
+    assert hosts.all.has_module("ping")
+    assert not hosts.all.has_module("a_module_that_most_certainly_does_not_exist")
+    assert module_resolver._modules == {
+        "ping": True,
+        "a_module_that_most_certainly_does_not_exist": False,
+    }
+
+    # Registering a new module path forgets the unknown modules
+    module_resolver.add_paths(["/nonexistent/library"])
+    assert module_resolver._modules == {"ping": True}
+
+
+def test_stream(hosts):
+    """Verify streamed module calls yield a result per host."""
+    results = dict(hosts.all.stream.ping())
+    assert set(results) == set(hosts.keys())
+    for result in results.values():
+        assert result["ping"] == "pong"
+
+
+def test_stream_unreachable():
+    """Verify unreachable hosts are yielded before the connection failure is raised."""
+    from pytest_ansible.errors import AnsibleConnectionFailure
+    from pytest_ansible.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="unknown.example.com,")
+    results = []
+    with pytest.raises(AnsibleConnectionFailure):
+        for host, result in hosts.all.stream.ping():
+            results.append((host, result))
+    assert len(results) == 1
+    assert results[0][0] == "unknown.example.com"
+    assert results[0][1].is_unreachable
+
+
+def test_fail_fast():
+    """Verify failing fast stops dispatching the call to more hosts."""
+    from pytest_ansible.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory=",".join("host%02d" % index for index in range(20)),
+        connection="local",
+        fail_fast=True,
+    )
+    contacted = hosts.all.command("false")
+    assert 0 < len(contacted) < 20
+    for result in contacted.values():
+        assert result.is_failed
+
+
+@pytest.mark.parametrize("forks", [1, "auto"])
+def test_forks(hosts, forks):
+    """Verify module calls honour the forks option."""
+    from pytest_ansible.executor import task_queue_manager_pool
+
+    task_queue_manager_pool.shutdown()
+    dispatcher = hosts.all.with_options(forks=forks)
+    assert dispatcher.options["forks"] == forks
+    assert len(dispatcher.ping()) == len(hosts.keys())
+
+    ((key, tqm),) = task_queue_manager_pool._idle
+    assert tqm._forks == (1 if forks == 1 else len(hosts.keys()))
+
+
+@pytest.mark.parametrize(
+    "serial, sizes",
+    [
+        ([1], [1, 1, 1]),
+        ([1, 2], [1, 2]),
+        (["50%"], [1, 1, 1]),
+        ([0], [3]),
+    ],
+)
+def test_serialized_batches(hosts, serial, sizes):
+    """Verify serial batches follow the playbook semantics."""
+    from ansible.playbook.play import Play
+
+    from pytest_ansible.module_dispatcher.v213 import serialized_batches
+
+    play = Play().load(
+        dict(hosts="all", gather_facts="no", serial=serial, tasks=[]),
+        variable_manager=hosts.options["variable_manager"],
+        loader=hosts.options["loader"],
+    )
+    batches = serialized_batches(play, hosts.options["inventory_manager"])
+    assert [len(batch) for batch in batches] == sizes
+
+
+@pytest.mark.parametrize("strategy", ["linear", "free", "host_pinned"])
+def test_strategy_and_serial(hosts, strategy):
+    """Verify module calls run on every host with any strategy and serial batches."""
+    contacted = hosts.all.with_options(strategy=strategy, serial=[1]).ping()
+    assert set(contacted) == set(hosts.keys())
+    assert not hosts.options["inventory_manager"]._restriction
+
+
+def test_connection_cache(hosts):
+    """Verify the connection cache takes over connections and restores everything."""
+    import os
+
+    from ansible.plugins.strategy import StrategyBase
+
+    from pytest_ansible.executor import ConnectionCache
+
+    cleanup = StrategyBase.cleanup
+    connection_cache = ConnectionCache()
+    connection_cache.enable(idle_timeout=5)
+    try:
+        assert connection_cache.enabled
+        assert StrategyBase.cleanup is not cleanup
+        assert os.environ["ANSIBLE_PERSISTENT_CONNECT_TIMEOUT"] == "5"
+        assert len(hosts.all.ping()) == len(hosts.keys())
+    finally:
+        connection_cache.shutdown()
+
+    assert not connection_cache.enabled
+    assert StrategyBase.cleanup is cleanup
+    assert "ANSIBLE_PERSISTENT_CONNECT_TIMEOUT" not in os.environ
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from pytest_ansible.results import ModuleResult
@@ -117,3 +119,17 @@ def module_result_unreachable():
 def test_is_property(request, fixture_name, prop, expected_result):
     fixture = request.getfixturevalue(fixture_name)
     assert getattr(fixture, prop) == expected_result
+
+
+def test_read_only_view():
+    result = {"changed": True}
+    view = ModuleResult(result)
+    assert view._result is result
+    assert ModuleResult(view)._result is result
+    assert ModuleResult(**result)._result is not result
+    assert view == result and view.copy() == result
+    assert json.loads(json.dumps(dict(view))) == result
+    assert view.is_changed
+
+    with pytest.raises(AttributeError):
+        view.changed = False
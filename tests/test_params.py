@@ -6,9 +6,8 @@ from unittest import mock
 import ansible
 import pytest
 
-from pkg_resources import parse_version
-
 from pytest_ansible.has_version import has_ansible_v28
+from pytest_ansible.has_version import parse_version
 
 
 try:
@@ -323,3 +322,107 @@ def test_param_override_with_marker(testdir):
     assert result.ret == EXIT_OK
 
     # Mock assert the correct variables are set
+
+
+def test_ansible_not_imported_when_not_using_fixture(testdir):
+    """Verify ansible is not configured by runs which do not use ansible fixtures."""
+
+    src = """
+        import sys
+        def test_func():
+            assert "ansible.constants" not in sys.modules
+            assert "pytest_ansible.host_manager" not in sys.modules
+    """
+    testdir.makepyfile(src)
+    result = testdir.runpytest_subprocess()
+    assert result.ret == EXIT_OK
+
+
+def test_ansible_host_parametrized_with_host_names(testdir, option):
+    """Verify tests using ansible_host get one test per host, named after it."""
+    src = """
+        import pytest
+        def test_func(ansible_host):
+            assert ansible_host.options["host_pattern"] in ("one", "two")
+    """
+    testdir.makepyfile(src)
+    result = testdir.runpytest(
+        *option.args
+        + [
+            "-v",
+            "--ansible-inventory",
+            "one,two,",
+            "--ansible-host-pattern",
+            "all",
+            "--ansible-connection",
+            "local",
+        ]
+    )
+    assert result.ret == EXIT_OK
+    result.stdout.fnmatch_lines(["*test_func?one? PASSED*", "*test_func?two? PASSED*"])
+
+
+@pytest.mark.parametrize(
+    "hosts, count, expected",
+    [
+        (["c", "a", "b", "d", "e"], 2, [["a", "c", "e"], ["b", "d"]]),
+        (["b", "a"], 3, [["a"], ["b"], []]),
+        ([], 2, [[], []]),
+    ],
+)
+def test_shard_hosts(hosts, count, expected):
+    """Verify hosts are dealt to xdist workers in stable, balanced shares."""
+    from pytest_ansible.plugin import shard_hosts
+
+    assert [shard_hosts(hosts, index, count) for index in range(count)] == expected
+
+
+def test_shard_hosts_limits_module_calls(testdir, option, monkeypatch):
+    """Verify --ansible-shard-hosts limits module calls to the share of an xdist worker."""
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw1")
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "2")
+    src = """
+        import pytest
+        def test_func(ansible_module):
+            assert list(ansible_module.ping()) == ["two"]
+    """
+    testdir.makepyfile(src)
+    result = testdir.runpytest(
+        *option.args
+        + [
+            "--ansible-shard-hosts",
+            "--ansible-inventory",
+            "one,two,",
+            "--ansible-host-pattern",
+            "all",
+            "--ansible-connection",
+            "local",
+        ]
+    )
+    assert result.ret == EXIT_OK
+
+
+def test_shard_hosts_skips_surplus_workers(testdir, option, monkeypatch):
+    """Verify a worker left without hosts skips its module calls."""
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw2")
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "3")
+    src = """
+        import pytest
+        def test_func(ansible_module):
+            ansible_module.ping()
+    """
+    testdir.makepyfile(src)
+    result = testdir.runpytest(
+        *option.args
+        + [
+            "--ansible-shard-hosts",
+            "--ansible-inventory",
+            "one,two,",
+            "--ansible-host-pattern",
+            "all",
+            "--ansible-connection",
+            "local",
+        ]
+    )
+    assert result.ret == EXIT_OK
+    result.stdout.fnmatch_lines(["*1 skipped*"])